@@ -0,0 +1,40 @@
+#!/usr/bin/python
+"""
+Batch module.
+
+Runs the game over script files (one command per line) without a human at the
+terminal. All scripts share the same game data and run concurrently in a single
+event loop, the output of each session is written in a single call.
+
+Usage: batch.py SCRIPT...
+"""
+
+
+import asyncio
+import sys
+
+
+from toi.gamedata import GameData
+from toi.gameio import ScriptedIO
+import toi.stage.runner as runner
+import toi.stage.startup as start
+
+
+async def run_session(io, data):
+    """ Run a single scripted session until the game ends or the script does. """
+    try:
+        await runner.execute(start.StartupFlow(io, data), start.ENTRY_POINT)
+    except EOFError:
+        pass
+
+
+async def run_scripts(paths, data, output=None):
+    """ Run scripted sessions concurrently, then write their output in order. """
+    ios = [ScriptedIO.from_file(path, output) for path in paths]
+    await asyncio.gather(*(run_session(io, data) for io in ios))
+    for io in ios:
+        io.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_scripts(sys.argv[1:], GameData()))
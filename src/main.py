@@ -2,12 +2,10 @@
 """ Main module. """
 
 
-import mofloc
-
-
+import toi.stage.runner as runner
 import toi.stage.startup as start
 
 
 if __name__ == "__main__":
     flow = start.StartupFlow()
-    mofloc.execute(flow, start.ENTRY_POINT)
+    runner.run(flow, start.ENTRY_POINT)
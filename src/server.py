@@ -0,0 +1,183 @@
+#!/usr/bin/python
+"""
+Server module.
+
+Runs a game server accepting line-based (telnet style) TCP connections. Every
+connection gets its own session, all the sessions share the same game data and
+compiled grammars (the common parsers and the dispatchers of every flow) and run
+in a single event loop.
+
+With '--workers N' the server pre-forks N worker processes instead. The master
+process loads the game data, compiles the grammars and freezes the garbage
+collector's view of the heap before forking, so that the workers share the data
+pages with it copy-on-write. The workers accept connections from a shared
+listening socket; the ones that die are replaced.
+
+With '--record DIR' every session is recorded as a transcript in a given
+directory, to be replayed later with 'python -m toi.replay'.
+
+Usage: server.py [--host HOST] [--port PORT] [--workers N] [--record DIR]
+"""
+
+
+import argparse
+import asyncio
+import gc
+import itertools
+import os
+import signal
+import socket
+import traceback
+
+
+import toi.commands as commands
+from toi.gamedata import GameData
+from toi.gameio import StreamIO
+import toi.gamestate as state
+from toi.replay import Recorder
+import toi.stage.runner as runner
+import toi.stage.startup as start
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 4000
+
+_SESSION_NUMBERS = itertools.count()
+
+
+async def run_session(reader, writer, data, record_dir=None):
+    """
+    Run a game session over a connection, then close it. If 'record_dir' is
+    given, the session is recorded as a transcript in that directory.
+    """
+    io = StreamIO(reader, writer)
+    if record_dir is not None:
+        io = Recorder(io)
+        io.install()
+    try:
+        await runner.execute(start.StartupFlow(io, data), start.ENTRY_POINT)
+        io.flush()
+        await writer.drain()
+    except (EOFError, ConnectionError):
+        pass
+    finally:
+        if record_dir is not None:
+            io.save(_transcript_path(record_dir))
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def serve(data, host=DEFAULT_HOST, port=DEFAULT_PORT, sock=None,
+                record_dir=None):
+    """
+    Accept connections on a given address (or an already listening socket)
+    forever, optionally recording the sessions in 'record_dir'.
+    """
+    handler = lambda reader, writer: run_session(reader, writer, data, record_dir)
+    if sock is None:
+        server = await asyncio.start_server(handler, host, port)
+    else:
+        server = await asyncio.start_server(handler, sock=sock)
+    async with server:
+        await server.serve_forever()
+
+
+def load_data():
+    """
+    Load all game data and make the common parsers and the dispatchers of
+    every flow, so that the sessions (and the workers) share them.
+    """
+    data = GameData()
+    data.preload()
+    state.GameState(data)
+    for flow_commands in commands.FLOWS.values():
+        state.shared_dispatcher(data, flow_commands)
+    return data
+
+
+def prefork(data, host, port, workers, record_dir=None):
+    """
+    Run the server in 'workers' worker processes sharing a listening socket.
+    Return when the master process is told to stop.
+    """
+    sock = socket.create_server((host, port))
+    gc.freeze()
+    children = set()
+    stopping = False
+    def stop(signum, frame):
+        """ Stop the workers and the master. """
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        children.add(_fork_worker(data, sock, record_dir))
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            children.add(_fork_worker(data, sock, record_dir))
+    sock.close()
+
+
+def parse_args():
+    """ Parse command line arguments. """
+    parser = argparse.ArgumentParser(description="Run a game server.")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="number of pre-forked worker processes "
+                        "(default: serve from a single process)")
+    parser.add_argument("--record", metavar="DIR",
+                        help="directory to record session transcripts in")
+    return parser.parse_args()
+
+
+#--------- helper things ---------#
+
+
+def _fork_worker(data, sock, record_dir):
+    """ Fork a worker process serving connections from a socket. """
+    pid = os.fork()
+    if pid != 0:
+        return pid
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    gc.enable()
+    status = 0
+    try:
+        asyncio.run(serve(data, sock=sock, record_dir=record_dir))
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+    os._exit(status)
+
+
+def _transcript_path(record_dir):
+    """ Return a new unique path of a transcript file. """
+    name = f"{os.getpid()}-{next(_SESSION_NUMBERS)}.transcript"
+    return os.path.join(record_dir, name)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.workers > 0:
+        gc.disable()
+        prefork(load_data(), args.host, args.port, args.workers, args.record)
+    else:
+        try:
+            asyncio.run(serve(load_data(), args.host, args.port, record_dir=args.record))
+        except KeyboardInterrupt:
+            pass
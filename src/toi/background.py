@@ -6,13 +6,17 @@ Provides Background class used to represent player character classes.
 
 
 import toi.cat.background as cat
+import toi.misc as misc
 import toi.stats as stats
 
 
 class Background():
     """ A class representing a playable class. """
 
+    __slots__ = ("ident", "name", "shortname", "stat_modifiers")
+
     def __init__(self, data):
+        self.ident = _read_ident(data)
         self.name = _read_name(data)
         self.shortname = _read_shortname(data)
         self.stat_modifiers = _read_stat_modifiers(data)
@@ -21,6 +25,14 @@ class Background():
 #--------- helper things ---------#
 
 
+def _read_ident(data):
+    """
+    Read a stable id from a data dict. If there is none, the normalized name is
+    used.
+    """
+    return data.get(cat.ID) or misc.normalize(data[cat.NAME])
+
+
 def _read_name(data):
     """ Read a name from a data dict. """
     return data[cat.NAME]
@@ -33,7 +45,7 @@ def _read_shortname(data):
 
 def _read_stat_modifiers(data):
     """ Read state modifiers info from a data dict. """
-    res = {}
+    res = stats.StatBlock()
     source_keys = [cat.STR, cat.DEX, cat.INT, cat.SPI, cat.CHA, cat.LUC]
     for target_key, source_key in zip(stats.Stat, source_keys):
         res[target_key] = data.get(source_key, 0)
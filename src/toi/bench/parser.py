@@ -0,0 +1,216 @@
+"""
+Parser benchmark module.
+
+Compiles every grammar of every control category and runs a corpus of valid,
+near-miss and garbage commands through the resulting parsers (and through a
+dispatcher merging all commands of a category). Compile times and parse
+throughput are printed as JSON. The parsers of the alternatives, normally
+shared, are dropped before each build, so the build times include making them.
+
+The parse cache is disabled unless its size is given with '--cache', in which
+case its hit and miss counters are printed too.
+
+Usage: python -m toi.bench.parser [-r REPEAT] [--seed SEED] [--cache SIZE]
+"""
+
+
+import argparse
+import itertools
+import json
+import random
+import string
+import time
+
+
+from toi.gamedata import GameData
+import toi.grammar as grammar
+import toi.misc as misc
+from toi.parser import Dispatcher, PARSE_CACHE, _ALTERNATIVES, make_parser, parse
+from toi.party import Party
+from toi.pc import PlayerCharacter
+from toi.stage.party_creation import StateWithParty
+
+
+MAX_VARIANTS = 64
+
+
+def main():
+    """ Run the benchmark and print the results. """
+    args = _parse_args()
+    rng = random.Random(args.seed)
+    game = make_game()
+    PARSE_CACHE.resize(args.cache)
+    PARSE_CACHE.clear()
+    res = run(game, rng, args.repeat)
+    if args.cache > 0:
+        res["cache"] = PARSE_CACHE.stats()
+    print(json.dumps(res, indent=2))
+
+
+def make_game():
+    """ Make a game state with a party for PC captures to match against. """
+    data = GameData()
+    data.preload()
+    game = StateWithParty(data)
+    game.party = Party("Benchmark")
+    names = ["Alice Smith", "Bob Jones", "Carol White", "Dave Black"]
+    for name, species, bg in zip(names, itertools.cycle(data.species),
+                                 itertools.cycle(data.backgrounds)):
+        game.party.add_character(PlayerCharacter(name, species, bg))
+    return game
+
+
+def run(game, rng, repeat):
+    """ Run the benchmark, return a dict with the results. """
+    res = {"grammars": {}, "dispatchers": {}}
+    for category, control in game.data.control.items():
+        corpus = []
+        for key, alternatives in control.items():
+            commands = make_corpus(alternatives, game, rng)
+            corpus.extend(commands)
+            res["grammars"][f"{category}/{key}"] = bench_grammar(alternatives, game, commands, repeat)
+        if control:
+            res["dispatchers"][category] = bench_dispatcher(control, game, corpus, repeat)
+    return res
+
+
+def bench_grammar(alternatives, game, commands, repeat):
+    """ Measure compile time and throughput of a single grammar. """
+    start = time.perf_counter()
+    for alternative in alternatives:
+        grammar._COMPILED.pop(alternative, None)
+        grammar.compile(alternative)
+    compile_time = time.perf_counter() - start
+    _ALTERNATIVES.pop(game.data, None)
+    start = time.perf_counter()
+    parser = make_parser(alternatives, game.data)
+    build_time = time.perf_counter() - start
+    matches = sum(1 for command in commands if parse(parser, command, game) is not None)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for command in commands:
+            parse(parser, command, game)
+    elapsed = time.perf_counter() - start
+    return {
+        "compile s": compile_time,
+        "build s": build_time,
+        "corpus size": len(commands),
+        "matches": matches,
+        "parses per s": _rate(len(commands) * repeat, elapsed),
+        }
+
+
+def bench_dispatcher(control, game, commands, repeat):
+    """ Measure build time and throughput of a dispatcher for a category. """
+    _ALTERNATIVES.pop(game.data, None)
+    start = time.perf_counter()
+    dispatcher = Dispatcher(control.items(), game.data)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for command in commands:
+            dispatcher.parse(command, game)
+    elapsed = time.perf_counter() - start
+    return {
+        "build s": build_time,
+        "corpus size": len(commands),
+        "parses per s": _rate(len(commands) * repeat, elapsed),
+        }
+
+
+def make_corpus(alternatives, game, rng):
+    """
+    Make a list of commands for a grammar: all valid variants (up to a limit
+    per alternative), near misses made from them and random garbage.
+    """
+    valid = []
+    for alternative in alternatives:
+        variants = expand(grammar.compile(alternative), _capture_values(game))
+        valid.extend(itertools.islice(variants, MAX_VARIANTS))
+    near_misses = [_mutate(command, rng) for command in valid]
+    garbage = [_garbage(rng) for _ in valid]
+    return valid + near_misses + garbage
+
+
+def expand(tokens, values):
+    """
+    Iterate over the strings matched by a compiled grammar. 'values' maps
+    capture names to lists of strings to substitute for them.
+    """
+    if not tokens:
+        yield ""
+        return
+    token, rest = tokens[0], tokens[1:]
+    kind = token[0]
+    if kind == grammar.LITERAL:
+        heads = [token[1]]
+    elif kind == grammar.WHITESPACE:
+        heads = [" "]
+    elif kind == grammar.OPTIONAL:
+        heads = itertools.chain([""], expand(token[1], values))
+    else:
+        heads = values[token[1]]
+    for head in heads:
+        for tail in expand(rest, values):
+            yield head + tail
+
+
+#--------- helper things ---------#
+
+
+def _capture_values(game):
+    """ Return the values to substitute for captures when expanding grammars. """
+    entities = lambda things: [misc.normalize(name)
+                               for thing in things
+                               for name in (thing.name, thing.shortname)]
+    long_name = " ".join(["very"] * 20 + ["long name"])
+    pcs = [alias for pc in game.party.characters for alias in pc.aliases]
+    return {
+        "bg": entities(game.data.backgrounds) + ["nonexistent bg"],
+        "name": ["bob", "bob the builder", long_name],
+        "pc": pcs + ["nobody"],
+        "species": entities(game.data.species) + ["nonexistent species"],
+        "topic": ["party creation", long_name],
+        }
+
+
+def _garbage(rng):
+    """ Return a random string. """
+    alphabet = string.ascii_lowercase + " ?[]{}"
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 30)))
+
+
+def _mutate(command, rng):
+    """ Return a command with a single random typo in it. """
+    if not command:
+        return _garbage(rng)
+    i = rng.randrange(len(command))
+    mutation = rng.randrange(3)
+    if mutation == 0:
+        return command[:i] + command[i + 1:]
+    if mutation == 1:
+        return command[:i] + rng.choice(string.ascii_lowercase) + command[i + 1:]
+    return command[:i] + rng.choice(string.ascii_lowercase) + command[i:]
+
+
+def _parse_args():
+    """ Parse command line arguments. """
+    parser = argparse.ArgumentParser(description="Measure parser performance.")
+    parser.add_argument("-r", "--repeat", type=int, default=20,
+                        help="number of passes over the corpus (default: 20)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed for corpus generation (default: 0)")
+    parser.add_argument("--cache", type=int, default=0,
+                        help="size of the parse cache (default: 0, disabled)")
+    return parser.parse_args()
+
+
+def _rate(count, elapsed):
+    """ Return the number of operations per second. """
+    if elapsed == 0:
+        return None
+    return count / elapsed
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Startup benchmark module.
+
+Measures how long it takes to get from the interpreter start to the first
+prompt, broken down into phases. Every run happens in a fresh interpreter, the
+medians over all runs are printed as JSON.
+
+Usage: python -m toi.bench.startup [-n RUNS] [--no-cache]
+"""
+
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+PHASES = [
+    "imports",
+    "game data",
+    "read backgrounds",
+    "read species",
+    "read control",
+    "read strings",
+    "io",
+    "main menu",
+    ]
+
+
+def main():
+    """ Run the benchmark and print the results. """
+    args = _parse_args()
+    if args.child:
+        print(json.dumps(measure()))
+        return
+    env = dict(os.environ)
+    if args.no_cache:
+        env["TOI_NO_CACHE"] = "1"
+    runs = [_run_child(env) for _ in range(args.runs)]
+    print(json.dumps(summarize(runs), indent=2))
+
+
+def measure():
+    """
+    Perform the startup steps of StartupFlow once, return a dict mapping phase
+    names to the time (in seconds) spent in them. The data categories are
+    loaded through the GameData object that is then given to the main menu,
+    the way the game loads them (control and strings - every category).
+    """
+    res = {}
+    start = time.perf_counter()
+    import mofloc
+    from toi.gamedata import GameData
+    import toi.gameio as gameio
+    import toi.stage.main_menu as mm
+    import toi.stage.startup
+    res["imports"] = time.perf_counter() - start
+    start = time.perf_counter()
+    data = GameData()
+    res["game data"] = time.perf_counter() - start
+    loaders = [
+        ("read backgrounds", lambda: data.backgrounds),
+        ("read species", lambda: data.species),
+        ("read control", data.control.preload),
+        ("read strings", data.strings.preload),
+        ]
+    for phase, loader in loaders:
+        start = time.perf_counter()
+        loader()
+        res[phase] = time.perf_counter() - start
+    start = time.perf_counter()
+    io = gameio.IO()
+    res["io"] = time.perf_counter() - start
+    start = time.perf_counter()
+    mm.MainMenuFlow(io, data)
+    res["main menu"] = time.perf_counter() - start
+    return res
+
+
+def summarize(runs):
+    """ Return the medians of the phases over several runs. """
+    medians = {}
+    for phase in PHASES:
+        medians[phase] = statistics.median(run[phase] for run in runs)
+    totals = [sum(run[phase] for phase in PHASES) for run in runs]
+    return {
+        "runs": len(runs),
+        "unit": "s",
+        "median": medians,
+        "median total": statistics.median(totals),
+        }
+
+
+#--------- helper things ---------#
+
+
+def _parse_args():
+    """ Parse command line arguments. """
+    parser = argparse.ArgumentParser(description="Measure startup latency.")
+    parser.add_argument("-n", "--runs", type=int, default=10,
+                        help="number of runs (default: 10)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="disable the on-disk caches")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def _run_child(env):
+    """ Run a single measurement in a fresh interpreter. """
+    output = subprocess.run(
+        [sys.executable, "-m", "toi.bench.startup", "--child"],
+        env=env, check=True, capture_output=True, text=True)
+    return json.loads(output.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Cache module.
+
+Provides functions to store and retrieve precomputed data (compiled grammars
+and the like) in an on-disk cache directory.
+"""
+
+
+import marshal
+import os
+from pathlib import Path
+
+
+def cache_dir():
+    """ Return the directory the cache files are kept in. """
+    explicit = os.environ.get("TOI_CACHE_DIR")
+    if explicit:
+        return Path(explicit)
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    if xdg:
+        return Path(xdg, "toi")
+    return Path.home() / ".cache" / "toi"
+
+
+def enabled():
+    """ Return True if the on-disk cache should be used. """
+    return not os.environ.get("TOI_NO_CACHE")
+
+
+def load(name):
+    """
+    Return an object stored in the cache under a given name, or None if there
+    is no such object or it can't be read.
+    """
+    if not enabled():
+        return None
+    try:
+        with open(cache_dir() / name, "rb") as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def store(name, obj):
+    """
+    Store an object in the cache under a given name. Failures to do so are
+    silently ignored - the cache is merely an optimization.
+    """
+    if not enabled():
+        return
+    directory = cache_dir()
+    target = directory / name
+    temp = directory / f".{name}.{os.getpid()}"
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(temp, "wb") as f:
+            marshal.dump(obj, f)
+        os.replace(temp, target)
+    except (OSError, ValueError):
+        try:
+            temp.unlink()
+        except OSError:
+            pass
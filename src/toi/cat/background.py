@@ -2,6 +2,7 @@
 Background string constants.
 """
 
+ID = "id"
 NAME = "name"
 SHORTNAME = "shortname"
 
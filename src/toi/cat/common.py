@@ -3,17 +3,26 @@ Common strings constants.
 """
 
 AMBIG_CMD = "ambiguous cmd"
+APROPOS_FOUND = "apropos found"
+APROPOS_NOTHING = "apropos nothing"
+DID_YOU_MEAN = "did you mean"
 EMPTY_CMD = "empty cmd"
 FAREWELL = "farewell"
 FAREWELL_WITH_PARTY = "farewell with party name"
+HELP_GREETING = "help greeting"
+HELP_MAYBE = "help maybe"
+HELP_PROMPT = "help prompt"
 JUST_YESNO = "just yes or no"
 JUST_YESNOABORT = "just yes no abort"
 LIST_PREFIX = "list leader"
+LIST_OR = "list or"
+NO_HELP = "no help"
 NO_SUCH_CHAR = "no such char"
 OKAY = "okay"
 WHAT = "what"
 
 CMD_ABORT = "abort"
+CMD_APROPOS = "apropos"
 CMD_HELP = "help"
 CMD_NO = "no"
 CMD_QUIT = "quit"
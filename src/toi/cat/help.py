@@ -0,0 +1,7 @@
+"""
+Help topic string constants.
+"""
+
+ALIASES = "aliases"
+NAME = "name"
+TEXT = "text"
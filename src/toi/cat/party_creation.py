@@ -2,6 +2,7 @@
 Party creation string constants.
 """
 
+CHAR_ADDED = "char added"
 DONE_DELETING = "done deleting"
 EMPTY_PARTY = "empty party"
 GREETING = "greeting"
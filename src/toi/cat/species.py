@@ -2,6 +2,7 @@
 Species string constants.
 """
 
+ID = "id"
 NAME = "name"
 SHORTNAME = "shortname"
 
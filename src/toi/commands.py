@@ -0,0 +1,90 @@
+"""
+Commands module.
+
+Lists the commands the input of every flow is dispatched to - (control category,
+command key) pairs in the order of priority - and provides 'check' function to
+find the commands of such a list that match the same input.
+
+The lists live here rather than in the flows, so that the conflicts between the
+commands of a flow are found once, when the game data is packed (see
+'toi.packer') or loaded (see 'GameData.check_commands'), and not while the game
+is played.
+"""
+
+
+import toi.cat as cat
+import toi.cat.char_creation as char
+import toi.cat.common as common
+import toi.cat.main_menu as mm
+import toi.cat.party_creation as party
+import toi.grammar as grammar
+
+
+CHAR_CREATION = (
+    (cat.COMMON, common.CMD_HELP),
+    (cat.COMMON, common.CMD_APROPOS),
+    (cat.COMMON, common.CMD_ABORT),
+    (cat.CHAR_CREATION, char.CMD_DONE),
+    (cat.CHAR_CREATION, char.CMD_LIST_BGS),
+    (cat.CHAR_CREATION, char.CMD_LIST_SPECIES),
+    (cat.CHAR_CREATION, char.CMD_OVERVIEW),
+    (cat.CHAR_CREATION, char.CMD_SET_BG),
+    (cat.CHAR_CREATION, char.CMD_SET_NAME),
+    (cat.CHAR_CREATION, char.CMD_SET_SPECIES),
+    )
+
+HELP = (
+    (cat.COMMON, common.CMD_ABORT),
+    (cat.COMMON, common.CMD_APROPOS),
+    (cat.COMMON, common.CMD_HELP),
+    (cat.COMMON, common.CMD_QUIT),
+    )
+
+MAIN_MENU = (
+    (cat.COMMON, common.CMD_HELP),
+    (cat.COMMON, common.CMD_APROPOS),
+    (cat.MAIN_MENU, mm.CMD_GREET),
+    (cat.MAIN_MENU, mm.CMD_NEW_GAME),
+    (cat.COMMON, common.CMD_QUIT),
+    )
+
+PARTY_CREATION = (
+    (cat.COMMON, common.CMD_ABORT),
+    (cat.COMMON, common.CMD_HELP),
+    (cat.COMMON, common.CMD_APROPOS),
+    (cat.COMMON, common.CMD_QUIT),
+    (cat.PARTY_CREATION, party.CMD_ADD),
+    (cat.PARTY_CREATION, party.CMD_QUICK_ADD),
+    (cat.PARTY_CREATION, party.CMD_CHANGE_PARTY_NAME),
+    (cat.PARTY_CREATION, party.CMD_DELETE),
+    (cat.PARTY_CREATION, party.CMD_EDIT),
+    (cat.PARTY_CREATION, party.CMD_OVERVIEW),
+    )
+
+FLOWS = {
+    "char creation": CHAR_CREATION,
+    "help": HELP,
+    "main menu": MAIN_MENU,
+    "party creation": PARTY_CREATION,
+    }
+
+
+def merge(control, commands):
+    """
+    Return a list of (key, alternative strings) pairs for a list of commands,
+    taking the grammars from 'control' - a dict of control categories.
+    """
+    return [(key, control[category][key]) for category, key in commands]
+
+
+def check(control, commands):
+    """
+    Return a list of problems with a list of commands: the pairs of commands
+    that match the same input (see 'grammar.analyze'). Commands whose heads
+    merely overlap are fine, as the longer head is tried first.
+    """
+    return [f"'{key}' and '{other_key}': '{string}' and '{other_string}' "
+            "match the same input"
+            for kind, (key, string), (other_key, other_string)
+            in grammar.analyze(merge(control, commands))
+            if kind == grammar.SAME]
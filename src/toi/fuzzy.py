@@ -0,0 +1,164 @@
+"""
+Fuzzy module.
+
+Provides FuzzyIndex class used to find the known words closest to a mistyped
+one, to suggest what the player might have meant.
+
+The words are indexed by their character n-grams (bigrams): the index maps
+every n-gram to the words containing it. A single edit changes at most GRAM
+n-grams of a word, so a word within (Levenshtein) distance D of the query has
+to share all but GRAM * D of its n-grams with it. A search counts the shared
+n-grams over the postings of the query's n-grams only, and computes the actual
+distance just for the few words that pass this filter and the length filter -
+so its cost depends on how common the query's n-grams are rather than on the
+size of the vocabulary.
+"""
+
+
+GRAM = 2
+MAX_SUGGESTIONS = 3
+MAX_TYPOS = 2
+MIN_LENGTH = 3
+
+_PAD = "\0"
+
+
+class FuzzyIndex():
+    """
+    An approximate-match index of words, each associated with a value (say, a
+    thing named by the word).
+    """
+
+    def __init__(self, pairs=()):
+        """
+        Create the index. 'pairs' is an iterable of (word, value) pairs; if a
+        word is given several times, the first value wins.
+        """
+        self.words = []
+        self.values = {}
+        self.postings = {}
+        for word, value in pairs:
+            self.add(word, value)
+
+    def __len__(self):
+        return len(self.words)
+
+    def add(self, word, value):
+        """ Add a word with its value to the index. """
+        if word in self.values:
+            return
+        self.values[word] = value
+        number = len(self.words)
+        self.words.append(word)
+        for gram, count in _grams(word).items():
+            self.postings.setdefault(gram, []).append((number, count))
+
+    def search(self, word, max_distance):
+        """
+        Return a list of (distance, word) pairs for the indexed words within
+        'max_distance' of a given one, the closest first.
+        """
+        if len(word) + 1 - GRAM * max_distance > 0:
+            shared = {}
+        else:
+            # even the words sharing no n-grams may be close enough
+            shared = dict.fromkeys(range(len(self.words)), 0)
+        for gram, count in _grams(word).items():
+            for number, other_count in self.postings.get(gram, ()):
+                shared[number] = shared.get(number, 0) + min(count, other_count)
+        res = []
+        for number, count in shared.items():
+            other = self.words[number]
+            if abs(len(other) - len(word)) > max_distance:
+                continue
+            if count < max(len(word), len(other)) + 1 - GRAM * max_distance:
+                continue
+            dist = distance(word, other, max_distance)
+            if dist <= max_distance:
+                res.append((dist, other))
+        res.sort()
+        return res
+
+    def suggest(self, word, limit=MAX_SUGGESTIONS):
+        """
+        Return a list of up to 'limit' distinct values of the indexed words
+        close enough to a given one, the closest first. How close is close
+        enough depends on the length of the word (see 'tolerance').
+        """
+        res = []
+        for _, match in self.search(word, tolerance(word)):
+            value = self.values[match]
+            if value not in res:
+                res.append(value)
+                if len(res) == limit:
+                    break
+        return res
+
+
+def distance(a, b, limit=None):
+    """
+    Return the Levenshtein distance between two strings. If 'limit' is given
+    and the distance is known to exceed it, some number greater than 'limit'
+    may be returned instead.
+
+    The distance is computed with the bit-parallel algorithm by Myers (in
+    Hyyrö's formulation): a column of the usual dynamic programming table is
+    kept as bit vectors of vertical deltas, one bit per character of 'a', and
+    is advanced by a few integer operations per character of 'b'.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    if not b:
+        return len(a)
+    masks = {}
+    for i, char in enumerate(b):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    full = (1 << len(b)) - 1
+    last = 1 << (len(b) - 1)
+    positive = full
+    negative = 0
+    res = len(b)
+    for char in a:
+        match = masks.get(char, 0)
+        vertical = match | negative
+        horizontal = (((match & positive) + positive) ^ positive) | match
+        plus = negative | (~(horizontal | positive) & full)
+        minus = positive & horizontal
+        if plus & last:
+            res += 1
+        elif minus & last:
+            res -= 1
+        plus = ((plus << 1) | 1) & full
+        minus = (minus << 1) & full
+        positive = minus | (~(vertical | plus) & full)
+        negative = plus & vertical
+    return res
+
+
+def tolerance(word):
+    """
+    Return the maximal distance at which a word is considered a typo of another
+    one: none for words shorter than MIN_LENGTH, one mistake per three letters
+    otherwise, but no more than MAX_TYPOS.
+    """
+    if len(word) < MIN_LENGTH:
+        return 0
+    return min(len(word) // 3, MAX_TYPOS)
+
+
+#--------- helper things ---------#
+
+
+def _grams(word):
+    """
+    Return a dict mapping the character n-grams (of GRAM characters) of a word,
+    padded on both ends, to the numbers of their occurrences.
+    """
+    padded = f"{_PAD * (GRAM - 1)}{word}{_PAD * (GRAM - 1)}"
+    res = {}
+    for i in range(len(padded) - GRAM + 1):
+        gram = padded[i:i + GRAM]
+        res[gram] = res.get(gram, 0) + 1
+    return res
@@ -3,26 +3,176 @@ Game data module.
 
 Provides GameData class used to hold all data of the game - control strings,
 normal strings, monster recipes, class recipes, etc.
+
+Every category of data is loaded on first access and cached afterwards, control
+and normal strings - file by file.
 """
 
 
+from collections.abc import Mapping
+from functools import cached_property
+
+
 import toi.background as bg
 import toi.cat as cat
-from toi.read import read
+import toi.commands as commands
+from toi.fuzzy import FuzzyIndex
+import toi.grammar as grammar
+from toi.help import Help, Topic
+import toi.misc as misc
+from toi.read import files, read
 import toi.species as species
 
 
+CONTROL_FILES = {
+    cat.CHAR_CREATION: "char_creation.yaml",
+    cat.COMMON: "common.yaml",
+    cat.MAIN_MENU: "main_menu.yaml",
+    cat.PARTY_CREATION: "party_creation.yaml",
+    cat.PC: "pc.yaml",
+    }
+
+
+STRING_FILES = {
+    cat.CHAR_CREATION: "char_creation.yaml",
+    cat.COMMON: "common.yaml",
+    cat.MAIN_MENU: "main_menu.yaml",
+    cat.PARTY_CREATION: "party_creation.yaml",
+    cat.PC: "pc.yaml",
+    }
+
+
 class GameData():
     """
     A container for game data.
     """
 
     def __init__(self):
-        self.backgrounds = _read_backgrounds()
-        self.control = _read_control()
-        self.help = _read_help()
-        self.species = _read_species()
-        self.strings = _read_strings()
+        self.control = LazyCategories(CONTROL_FILES, _read_control_file)
+        self.strings = LazyCategories(STRING_FILES, _read_strings_file)
+
+    @cached_property
+    def backgrounds(self):
+        """ A list of playable backgrounds. """
+        return _read_backgrounds()
+
+    @cached_property
+    def background_ids(self):
+        """ A dict mapping background ids to backgrounds. """
+        return {bg.ident: bg for bg in self.backgrounds}
+
+    @cached_property
+    def background_index(self):
+        """ A dict mapping normalized background names to backgrounds. """
+        return misc.name_index(self.backgrounds)
+
+    @cached_property
+    def background_suggestions(self):
+        """
+        A FuzzyIndex mapping normalized background names to background names.
+        """
+        return _name_suggestions(self.background_index)
+
+    @cached_property
+    def command_conflicts(self):
+        """
+        A list of problems with the commands of the flows (see 'toi.commands'):
+        the pairs of commands of a flow that match the same input.
+        """
+        res = []
+        for flow, flow_commands in commands.FLOWS.items():
+            problems = commands.check(self.control, flow_commands)
+            res.extend(map(lambda problem: f"{flow}: {problem}", problems))
+        return res
+
+    @cached_property
+    def help(self):
+        """ The help corpus, indexed for searching (see 'toi.help'). """
+        return _read_help()
+
+    @cached_property
+    def species(self):
+        """ A list of playable species. """
+        return _read_species()
+
+    @cached_property
+    def species_ids(self):
+        """ A dict mapping species ids to species. """
+        return {species.ident: species for species in self.species}
+
+    @cached_property
+    def species_index(self):
+        """ A dict mapping normalized species names to species. """
+        return misc.name_index(self.species)
+
+    @cached_property
+    def species_suggestions(self):
+        """ A FuzzyIndex mapping normalized species names to species names. """
+        return _name_suggestions(self.species_index)
+
+    def check_commands(self):
+        """
+        Raise RuntimeError if some commands of a flow match the same input
+        (see 'command_conflicts').
+        """
+        if self.command_conflicts:
+            raise RuntimeError(
+                "Conflicting commands:\n" + "\n".join(self.command_conflicts))
+
+    def preload(self):
+        """
+        Load every category of the game data right away, and check the
+        commands of the flows.
+        """
+        _ = self.background_ids
+        _ = self.background_index
+        _ = self.background_suggestions
+        _ = self.help
+        _ = self.species_ids
+        _ = self.species_index
+        _ = self.species_suggestions
+        self.control.preload()
+        self.strings.preload()
+        self.check_commands()
+
+
+class LazyCategories(Mapping):
+    """
+    A read-only dict of data categories, each of which is read from its own
+    file on first access.
+    """
+
+    def __init__(self, files, reader):
+        """
+        Create the dict. 'files' is a dict mapping categories to file names,
+        'reader' is a function to read a single file.
+        """
+        self.files = files
+        self.reader = reader
+        self.loaded = {}
+
+    def __getitem__(self, category):
+        try:
+            return self.loaded[category]
+        except KeyError:
+            pass
+        res = self.reader(self.files[category])
+        self.loaded[category] = res
+        return res
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+    def preload(self):
+        """ Read every category right away. """
+        for category in self.files:
+            _ = self[category]
+
+
+#--------- helper things ---------#
 
 
 def _read_backgrounds():
@@ -30,20 +180,27 @@ def _read_backgrounds():
     return list(map(lambda data: bg.Background(data), read("data", "backgrounds.yaml")))
 
 
-def _read_control():
-    """ Read game control strings. """
-    res = {}
-    res[cat.CHAR_CREATION] = read("control", "char_creation.yaml")
-    res[cat.COMMON] = read("control", "common.yaml")
-    res[cat.MAIN_MENU] = read("control", "main_menu.yaml")
-    res[cat.PARTY_CREATION] = read("control", "party_creation.yaml")
-    res[cat.PC] = read("control", "pc.yaml")
+def _read_control_file(filename):
+    """
+    Read a single control file and make sure the grammars it contains are
+    compiled.
+    """
+    res = read("control", filename)
+    grammar.preload(res)
     return res
 
 
 def _read_help():
-    """ Read help strings. """
-    return NotImplemented
+    """ Read help topics from every help file. """
+    topics = []
+    for filename in files("help"):
+        topics.extend(map(lambda data: Topic(data), read(filename)))
+    return Help(topics)
+
+
+def _name_suggestions(index):
+    """ Make a FuzzyIndex from a name index (see 'misc.name_index'). """
+    return FuzzyIndex(map(lambda item: (item[0], item[1].name), index.items()))
 
 
 def _read_species():
@@ -51,12 +208,6 @@ def _read_species():
     return list(map(lambda data: species.Species(data), read("data", "species.yaml")))
 
 
-def _read_strings():
-    """ Read game strings. """
-    res = {}
-    res[cat.CHAR_CREATION] = read("strings", "char_creation.yaml")
-    res[cat.COMMON] = read("strings", "common.yaml")
-    res[cat.MAIN_MENU] = read("strings", "main_menu.yaml")
-    res[cat.PARTY_CREATION] = read("strings", "party_creation.yaml")
-    res[cat.PC] = read("strings", "pc.yaml")
-    return res
+def _read_strings_file(filename):
+    """ Read a single strings file. """
+    return read("strings", filename)
@@ -1,11 +1,16 @@
 """
 IO module.
 
-Provides IO class used to handle user input and output.
+Provides IO class used to handle user input and output, ScriptedIO class used
+to run the game from a script of commands and StreamIO class used to talk to a
+player over a network connection.
 """
 
+import asyncio
 from collections import deque
+from functools import cache
 import readline
+import sys
 
 import toi.cat.io as cat
 from toi.misc import normalize
@@ -13,6 +18,7 @@ from toi.read import read
 
 
 MAX_LINES = 20
+PAGE_LINES = MAX_LINES + 1
 
 
 class IO():
@@ -20,19 +26,18 @@ class IO():
 
     def __init__(self):
         self.input = deque()
-        self.strings = read("strings", "io.yaml")
+        self.strings = _read_strings()
 
     def say(self, *things):
         """ Add a line to the output queue. """
         for line in "".join(map(str, things)).splitlines():
             self.input.append(line.strip())
 
-    def ask(self, prompt, do_normalize=False):
+    async def ask(self, prompt, do_normalize=False):
         """
         Request user input. Return the inputted string, optionally normalized.
         """
-        self.flush()
-        print()
+        self._write_pages("\n")
         inp = input(f"{prompt.strip()} ")
         if do_normalize:
             inp = normalize(inp)
@@ -40,13 +45,131 @@ class IO():
 
     def flush(self):
         """ Print the collected output. """
-        i = 0
-        for block in self.input:
-            for line in block.splitlines():
-                print(line)
-                i += 1
-                if i > MAX_LINES:
-                    print(self.strings[cat.CONTINUE])
-                    input()
-                    i = 0
+        self._write_pages("")
+
+    def _write_pages(self, tail):
+        """
+        Print the collected output followed by 'tail', with a single write per
+        page. After each full page wait for the user if there is more output to
+        come.
+        """
+        lines = list(self.input)
+        self.input.clear()
+        start = 0
+        while len(lines) - start > PAGE_LINES:
+            page = lines[start:start + PAGE_LINES]
+            page.append(self.strings[cat.CONTINUE])
+            sys.stdout.write("\n".join(page) + "\n")
+            sys.stdout.flush()
+            input()
+            start += PAGE_LINES
+        rest = lines[start:]
+        text = "".join(map(lambda line: line + "\n", rest))
+        sys.stdout.write(text + tail)
+        sys.stdout.flush()
+
+
+class ScriptedIO(IO):
+    """
+    Input and output handler that takes user input from a script and collects
+    all output into a single buffer, without paging.
+    """
+
+    def __init__(self, commands, output=None):
+        """
+        Create the handler. 'commands' is an iterable of input lines, 'output'
+        is a file-like object to write the collected output to on 'close' (the
+        standard output by default).
+        """
+        super().__init__()
+        self.commands = iter(commands)
+        self.buffer = []
+        self.output = sys.stdout if output is None else output
+
+    @classmethod
+    def from_file(cls, path, output=None):
+        """ Create a handler reading commands from a file, one per line. """
+        with open(path) as f:
+            commands = f.read().splitlines()
+        return cls(commands, output)
+
+    async def ask(self, prompt, do_normalize=False):
+        """
+        Return the next command from the script, optionally normalized. Raise
+        EOFError if the script is exhausted. Other coroutines get a chance to
+        run before the command is returned.
+        """
+        self.flush()
+        await asyncio.sleep(0)
+        try:
+            inp = next(self.commands)
+        except StopIteration:
+            raise EOFError from None
+        self.buffer.append(f"\n{prompt.strip()} {inp}\n")
+        if do_normalize:
+            inp = normalize(inp)
+        return inp
+
+    def flush(self):
+        """ Move the collected output to the buffer. """
+        for line in self.input:
+            self.buffer.append(line)
+            self.buffer.append("\n")
         self.input.clear()
+
+    def getvalue(self):
+        """ Return all the output so far. """
+        self.flush()
+        return "".join(self.buffer)
+
+    def close(self):
+        """ Write all the collected output with a single call. """
+        self.output.write(self.getvalue())
+        self.buffer.clear()
+
+
+class StreamIO(IO):
+    """
+    Input and output handler talking to a player over a line-based (telnet
+    style) connection, given as a pair of asyncio streams. There's no paging,
+    the client takes care of scrolling.
+    """
+
+    def __init__(self, reader, writer):
+        super().__init__()
+        self.reader = reader
+        self.writer = writer
+
+    async def ask(self, prompt, do_normalize=False):
+        """
+        Send the collected output and a prompt to the player and return the
+        line they send back, optionally normalized. Raise EOFError if the
+        connection is closed.
+        """
+        self.flush()
+        self.writer.write(f"\r\n{prompt.strip()} ".encode("utf-8"))
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise EOFError
+        inp = line.decode("utf-8", errors="replace").rstrip("\r\n")
+        if do_normalize:
+            inp = normalize(inp)
+        return inp
+
+    def flush(self):
+        """ Send the collected output with a single write. """
+        if not self.input:
+            return
+        text = "".join(map(lambda line: line + "\r\n", self.input))
+        self.input.clear()
+        self.writer.write(text.encode("utf-8"))
+
+
+#--------- helper things ---------#
+
+
+@cache
+def _read_strings():
+    """ Read IO strings, once per process. """
+    return read("strings", "io.yaml")
@@ -4,12 +4,20 @@ Game State module.
 Provides GameState base class used to hold various game information: just
 common control parsers and game data in its minimal configuration. The class is
 supposed to be subclassed for concrete Flows.
+
+Parsers only depend on game data, so the common control parsers and the input
+dispatchers of the flows are built once and shared by all the game states using
+the same game data (see 'shared_dispatcher').
 """
 
 
+import weakref
+
+
 import toi.cat as cat
 import toi.cat.common as common
-from toi.parser import make_parser
+import toi.commands as commands
+from toi.parser import Dispatcher, make_parser
 
 
 class GameState():
@@ -19,15 +27,45 @@ class GameState():
 
     def __init__(self, data):
         self.data = data
-        self.common_parsers = self.generate_common_parsers(data)
+        try:
+            self.common_parsers = _SHARED_PARSERS[data]
+        except KeyError:
+            self.common_parsers = self.generate_common_parsers(data)
+            _SHARED_PARSERS[data] = self.common_parsers
 
     def generate_common_parsers(self, data):
         """ Generate parsers common to all flows. """
         control = data.control[cat.COMMON]
         res = {}
-        res[common.CMD_HELP] = make_parser(control[common.CMD_HELP], self)
-        res[common.CMD_QUIT] = make_parser(control[common.CMD_QUIT], self)
-        res[common.CMD_YES] = make_parser(control[common.CMD_YES], self)
-        res[common.CMD_NO] = make_parser(control[common.CMD_NO], self)
-        res[common.CMD_ABORT] = make_parser(control[common.CMD_ABORT], self)
+        res[common.CMD_HELP] = make_parser(control[common.CMD_HELP], data)
+        res[common.CMD_QUIT] = make_parser(control[common.CMD_QUIT], data)
+        res[common.CMD_YES] = make_parser(control[common.CMD_YES], data)
+        res[common.CMD_NO] = make_parser(control[common.CMD_NO], data)
+        res[common.CMD_ABORT] = make_parser(control[common.CMD_ABORT], data)
         return res
+
+
+def shared_dispatcher(data, flow_commands):
+    """
+    Return a dispatcher for given commands - an iterable of (control category,
+    command key) pairs, in the order of priority (see 'toi.commands'). It's
+    made the first time it's asked for with given game data, after checking
+    the commands of all the flows (see 'GameData.check_commands').
+    """
+    flow_commands = tuple(flow_commands)
+    dispatchers = _SHARED_DISPATCHERS.setdefault(data, {})
+    try:
+        return dispatchers[flow_commands]
+    except KeyError:
+        pass
+    data.check_commands()
+    res = Dispatcher(commands.merge(data.control, flow_commands), data)
+    dispatchers[flow_commands] = res
+    return res
+
+
+#--------- helper things ---------#
+
+
+_SHARED_DISPATCHERS = weakref.WeakKeyDictionary()
+_SHARED_PARSERS = weakref.WeakKeyDictionary()
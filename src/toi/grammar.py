@@ -0,0 +1,280 @@
+"""
+Grammar module.
+
+Provides 'compile' function to transform control strings into an intermediate
+form - a tuple of tokens - which 'toi.parser' turns into actual parsers,
+'preload' function to fill the compiled grammars table from an on-disk cache,
+a couple of functions to describe compiled grammars in plain words and a static
+analysis of sets of commands: 'heads' expands the literal beginnings of a
+grammar and 'analyze' finds the commands whose grammars may match the same
+input.
+
+Tokens are tuples, the first element of which is the token kind:
+* (LITERAL, text) - a literal string,
+* (WHITESPACE,) - one or more whitespace characters,
+* (OPTIONAL, tokens) - an optional group,
+* (CAPTURE, name) - a capture, like '{bg}' or '{name}'.
+"""
+
+
+import hashlib
+import json
+
+
+import toi.cache as cache
+
+
+LITERAL = "lit"
+OPTIONAL = "opt"
+WHITESPACE = "ws"
+CAPTURE = "cap"
+
+CAPTURES = ("bg", "name", "pc", "species", "topic")
+
+# conflict kinds
+OVERLAP = "overlap"
+SAME = "same"
+
+CACHE_VERSION = 1
+
+
+#--------- main things ---------#
+
+
+def compile(string):
+    """ Return a tuple of tokens representing a given grammar string. """
+    try:
+        return _COMPILED[string]
+    except KeyError:
+        pass
+    tokens = _tokenize(string, string)
+    _COMPILED[string] = tokens
+    return tokens
+
+
+def preload(control):
+    """
+    Make sure every grammar in 'control' dict (a single control category) is
+    compiled, using the on-disk cache keyed by the contents of the category if
+    possible.
+    """
+    strings = list(_strings(control))
+    if all(string in _COMPILED for string in strings):
+        return
+    cache_name = f"grammar-{CACHE_VERSION}-{_digest(control)}"
+    cached = cache.load(cache_name)
+    if isinstance(cached, dict):
+        _COMPILED.update(cached)
+        return
+    compiled = {string: compile(string) for string in strings}
+    cache.store(cache_name, compiled)
+
+
+def literal_prefix(tokens, optional=True):
+    """
+    Return the literal text a compiled grammar starts with - everything before
+    the first capture, with the optional groups either included or left out.
+    """
+    res = []
+    _collect_prefix(tokens, optional, res)
+    return " ".join("".join(res).split())
+
+
+def usage(tokens):
+    """
+    Return a compiled grammar in plain words: the optional groups included and
+    the captures written as upper-case placeholders, like 'edit PC'.
+    """
+    res = []
+    for token in tokens:
+        kind = token[0]
+        if kind == LITERAL:
+            res.append(token[1])
+        elif kind == WHITESPACE:
+            res.append(" ")
+        elif kind == OPTIONAL:
+            res.append(usage(token[1]))
+        else:
+            res.append(token[1].upper())
+    return "".join(res)
+
+
+def heads(tokens):
+    """
+    Return a list of the literal beginnings (heads) of a compiled grammar, one
+    for every way of taking or skipping its optional groups, up to the first
+    capture. Every head is a (pieces, complete) pair: 'pieces' is a tuple of
+    characters, where None stands for a whitespace token, and 'complete' is
+    True if the grammar has no captures past the head, so it matches exactly
+    the head. Any input matched by the grammar starts with one of its heads.
+    """
+    res = []
+    for pieces, stopped in _expand(tokens):
+        head = (pieces, not stopped)
+        if head not in res:
+            res.append(head)
+    return res
+
+
+def analyze(commands):
+    """
+    Find the conflicts between commands - an iterable of (key, grammar
+    strings) pairs. Return a list of (kind, (key, string), (key, string))
+    tuples, where 'kind' is SAME if the grammars have a common head (so they
+    match the same input, up to the captures), and OVERLAP if a head of one of
+    them is a prefix of a head of the other (so some input matched by the
+    latter is also matched by the former, captures allowing). The command
+    given first comes first in a conflict.
+    """
+    entries = []
+    for key, strings in commands:
+        for string in strings:
+            for pieces, complete in heads(compile(string)):
+                entries.append((key, string, _comparable(pieces), complete))
+    res = []
+    for i, (key, string, head, complete) in enumerate(entries):
+        for other_key, other_string, other_head, other_complete in entries[i + 1:]:
+            if key == other_key:
+                continue
+            kind = _conflict(head, complete, other_head, other_complete)
+            conflict = (kind, (key, string), (other_key, other_string))
+            if kind is not None and conflict not in res:
+                res.append(conflict)
+    res.sort(key=lambda conflict: conflict[0] != SAME)
+    return res
+
+
+#--------- helper things ---------#
+
+
+_COMPILED = {}
+
+
+def _comparable(pieces):
+    """ Turn head pieces into a string, whitespace tokens becoming spaces. """
+    return "".join(map(lambda piece: " " if piece is None else piece, pieces))
+
+
+def _conflict(head, complete, other_head, other_complete):
+    """ Return the kind of conflict between two heads, or None. """
+    if head == other_head and complete == other_complete:
+        return SAME
+    if complete and other_complete:
+        return None
+    if complete:
+        return OVERLAP if head.startswith(other_head) else None
+    if other_complete:
+        return OVERLAP if other_head.startswith(head) else None
+    if head.startswith(other_head) or other_head.startswith(head):
+        return OVERLAP
+    return None
+
+
+def _expand(tokens):
+    """
+    Return a list of (pieces, stopped) pairs for every way of taking or
+    skipping the optional groups of 'tokens', 'stopped' telling whether a
+    capture was met.
+    """
+    res = [((), False)]
+    for token in tokens:
+        kind = token[0]
+        expanded = []
+        for pieces, stopped in res:
+            if stopped:
+                expanded.append((pieces, True))
+            elif kind == LITERAL:
+                expanded.append((pieces + tuple(token[1]), False))
+            elif kind == WHITESPACE:
+                expanded.append((pieces + (None,), False))
+            elif kind == OPTIONAL:
+                expanded.append((pieces, False))
+                for sub_pieces, sub_stopped in _expand(token[1]):
+                    expanded.append((pieces + sub_pieces, sub_stopped))
+            else:
+                expanded.append((pieces, True))
+        res = expanded
+    return res
+
+
+def _collect_prefix(tokens, optional, res):
+    """
+    Append the pieces of the literal prefix of 'tokens' to 'res'. Return False
+    if a capture was met (and so the prefix ended), True otherwise.
+    """
+    for token in tokens:
+        kind = token[0]
+        if kind == LITERAL:
+            res.append(token[1])
+        elif kind == WHITESPACE:
+            res.append(" ")
+        elif kind == OPTIONAL:
+            if optional and not _collect_prefix(token[1], optional, res):
+                return False
+        else:
+            return False
+    return True
+
+
+def _digest(control):
+    """ Return a content hash of a control category. """
+    dump = json.dumps(control, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(dump.encode("utf-8")).hexdigest()
+
+
+def _strings(control):
+    """ Iterate over all grammar strings in a control category. """
+    for alternatives in control.values():
+        yield from alternatives
+
+
+def _tokenize(string, whole):
+    """
+    Turn a grammar string into a tuple of tokens. 'whole' is the complete
+    grammar string the 'string' is a part of, used for error reporting.
+    """
+    res = []
+    i = 0
+    length = len(string)
+    while i < length:
+        char = string[i]
+        if char.isspace():
+            j = i
+            while j < length and string[j].isspace():
+                j += 1
+            res.append((WHITESPACE,))
+        elif char == "[":
+            j = _matching_bracket(string, i, whole)
+            res.append((OPTIONAL, _tokenize(string[i + 1:j], whole)))
+            j += 1
+        elif char == "{":
+            j = string.find("}", i)
+            name = string[i + 1:j]
+            if j == -1 or name not in CAPTURES:
+                raise RuntimeError(f"Failed to construct a parser from: '{whole}'")
+            res.append((CAPTURE, name))
+            j += 1
+        elif char in "]}":
+            raise RuntimeError(f"Failed to construct a parser from: '{whole}'")
+        else:
+            j = i
+            while j < length and string[j] not in "[]{}":
+                j += 1
+            res.append((LITERAL, string[i:j]))
+        i = j
+    if not res:
+        raise RuntimeError(f"Failed to construct a parser from: '{whole}'")
+    return tuple(res)
+
+
+def _matching_bracket(string, start, whole):
+    """ Return the index of the bracket closing the one at 'start'. """
+    depth = 0
+    for i in range(start, len(string)):
+        if string[i] == "[":
+            depth += 1
+        elif string[i] == "]":
+            depth -= 1
+            if depth == 0:
+                return i
+    raise RuntimeError(f"Failed to construct a parser from: '{whole}'")
@@ -0,0 +1,144 @@
+"""
+Help module.
+
+Provides Topic class representing a help topic and Help class holding the help
+corpus together with its inverted index, which maps every word of the topics to
+the topics containing it along with the word's weight in each of them. The index
+is built once, when the corpus is loaded, so a search only looks at the words
+searched for and never scans the text of the topics.
+"""
+
+
+import bisect
+import math
+import re
+
+
+import toi.cat.help as cat
+import toi.misc as misc
+
+
+NAME_WEIGHT = 3
+PREFIX_WEIGHT = 0.5
+
+_STOPWORDS = frozenset(
+    ["a", "an", "and", "as", "at", "by", "for", "in", "is", "it", "of", "on",
+     "or", "the", "to", "with"])
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class Topic():
+    """ A class representing a help topic. """
+
+    __slots__ = ("name", "aliases", "text")
+
+    def __init__(self, data):
+        self.name = _read_name(data)
+        self.aliases = _read_aliases(data)
+        self.text = _read_text(data)
+
+    def names(self):
+        """ Return a list of the normalized name and aliases of the topic. """
+        return [misc.normalize(self.name), *map(misc.normalize, self.aliases)]
+
+
+class Help():
+    """ A help corpus with an inverted index for searching it. """
+
+    def __init__(self, topics):
+        self.topics = sorted(topics, key=lambda topic: misc.normalize(topic.name))
+        self.names = {}
+        for topic in self.topics:
+            for name in topic.names():
+                self.names.setdefault(name, topic)
+        self.postings = _index(self.topics)
+        self.vocabulary = sorted(self.postings)
+
+    def find(self, name):
+        """ Return the topic with a given name or alias, or None. """
+        return self.names.get(misc.normalize(name))
+
+    def apropos(self, query, limit=None):
+        """
+        Return a list of topics matching the words of 'query', the most
+        relevant first. The topic named (or aliased) exactly as the query comes
+        first, then the topics matching more of the words, then the ones with
+        higher total weight of the matching words. A word matches the words
+        it's a prefix of too, at a lower weight.
+        """
+        exact = self.find(query)
+        scores = {}
+        matched = {}
+        for word in set(_words(query)):
+            hits = self._lookup(word)
+            for i, weight in hits.items():
+                scores[i] = scores.get(i, 0) + weight
+                matched[i] = matched.get(i, 0) + 1
+        if exact is not None:
+            i = self.topics.index(exact)
+            scores.setdefault(i, 0)
+            matched.setdefault(i, 0)
+        ranked = sorted(scores, key=lambda i: (
+            self.topics[i] is not exact, -matched[i], -scores[i], i))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self.topics[i] for i in ranked]
+
+    def _lookup(self, word):
+        """
+        Return a dict mapping topic numbers to the weights of a word and the
+        words it's a prefix of in the topics.
+        """
+        res = dict(self.postings.get(word, ()))
+        start = bisect.bisect_right(self.vocabulary, word)
+        for other in self.vocabulary[start:]:
+            if not other.startswith(word):
+                break
+            for i, weight in self.postings[other]:
+                res[i] = max(res.get(i, 0), weight * PREFIX_WEIGHT)
+        return res
+
+
+#--------- helper things ---------#
+
+
+def _index(topics):
+    """
+    Build an inverted index of topics: a dict mapping words to tuples of (topic
+    number, weight) pairs. The weight is the number of occurrences of the word
+    in the topic (the ones in the name and the aliases count NAME_WEIGHT times)
+    scaled by how rare the word is among the topics.
+    """
+    counts = {}
+    for i, topic in enumerate(topics):
+        for word in _words(" ".join(topic.names())):
+            counts.setdefault(word, {}).setdefault(i, 0)
+            counts[word][i] += NAME_WEIGHT
+        for word in _words(topic.text):
+            counts.setdefault(word, {}).setdefault(i, 0)
+            counts[word][i] += 1
+    res = {}
+    for word, occurrences in counts.items():
+        rarity = math.log(1 + len(topics) / len(occurrences))
+        res[word] = tuple((i, count * rarity) for i, count in occurrences.items())
+    return res
+
+
+def _read_aliases(data):
+    """ Read topic aliases from a dictionary. """
+    return list(map(str, data.get(cat.ALIASES, [])))
+
+
+def _read_name(data):
+    """ Read topic name from a dictionary. """
+    return data[cat.NAME]
+
+
+def _read_text(data):
+    """ Read topic text from a dictionary. """
+    return data[cat.TEXT]
+
+
+def _words(text):
+    """ Return a list of the words of a text that are worth indexing. """
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
@@ -0,0 +1,195 @@
+"""
+Journal module.
+
+Provides Journal class used to persist a party as a snapshot (a save file, see
+'toi.save') plus an append-only journal of the changes made since the snapshot
+was taken, and 'open_party' function to restore a party from them.
+
+Every entry is a length-prefixed 'marshal' dump of a (sequence number, change)
+pair, so writing an entry costs as much as the change itself. Once the journal
+grows long enough, it is compacted: the party is serialized right away, the
+journal is moved aside and a new one is started, and the snapshot is written in
+a background thread, after which the old journal is removed. The snapshot
+remembers the sequence number of the last change it reflects, so that restoring
+after an interrupted compaction doesn't apply any change twice.
+
+An old journal left behind (the snapshot wasn't written) holds the only copy of
+its changes, so it is never overwritten: restoring the party writes the snapshot
+right away and removes the old journal, and no compaction starts while there's
+an old journal.
+"""
+
+
+import marshal
+import os
+import struct
+import threading
+
+
+from toi.party import Party
+import toi.party as party_changes
+from toi.pc import PlayerCharacter
+import toi.save as save
+
+
+DEFAULT_THRESHOLD = 1000
+
+_LENGTH = struct.Struct("<I")
+
+
+class Journal():
+    """ A journal of changes of a party. """
+
+    def __init__(self, base_path, party, seq=0, threshold=DEFAULT_THRESHOLD, entries=0):
+        """
+        Create a journal for a party and attach it to the party. 'base_path'
+        is the path of the files without the extension, 'seq' is the sequence
+        number of the last change already persisted, 'threshold' is the number
+        of entries after which the journal is compacted, 'entries' is the
+        number of entries already in the journal file.
+        """
+        self.snapshot_path = f"{base_path}{save.EXTENSION}"
+        self.journal_path = f"{base_path}.journal"
+        self.old_journal_path = f"{base_path}.journal.old"
+        self.party = party
+        self.seq = seq
+        self.threshold = threshold
+        self.entries = entries
+        self.compaction = None
+        self.file = open(self.journal_path, "ab")
+        party.journal = self
+
+    def append(self, change):
+        """ Record a change, compacting the journal if it's long enough. """
+        self.seq += 1
+        blob = marshal.dumps((self.seq, change))
+        self.file.write(_LENGTH.pack(len(blob)) + blob)
+        self.file.flush()
+        self.entries += 1
+        if self.entries >= self.threshold:
+            self.compact()
+
+    def close(self):
+        """ Stop recording changes and wait for the compaction to finish. """
+        self.wait()
+        self.file.close()
+        self.party.journal = None
+
+    def compact(self):
+        """
+        Start writing a snapshot of the party in the background. Do nothing if
+        the old journal is still there (the last snapshot couldn't be
+        written): the changes keep going to the current journal, and the old
+        one is dealt with when the party is restored.
+        """
+        self.wait()
+        if os.path.exists(self.old_journal_path):
+            return
+        contents = save.dump_party(self.party, self.seq)
+        self.file.close()
+        os.replace(self.journal_path, self.old_journal_path)
+        self.file = open(self.journal_path, "ab")
+        self.entries = 0
+        self.compaction = threading.Thread(
+            target=self._write_snapshot, args=(contents,), daemon=True)
+        self.compaction.start()
+
+    def wait(self):
+        """ Wait for the compaction in progress (if any) to finish. """
+        if self.compaction is not None:
+            self.compaction.join()
+            self.compaction = None
+
+    def _write_snapshot(self, contents):
+        """ Write a snapshot and remove the journal it makes obsolete. """
+        save.write_file(self.snapshot_path, contents)
+        try:
+            os.remove(self.old_journal_path)
+        except FileNotFoundError:
+            pass
+
+
+def open_party(base_path, data, name, threshold=DEFAULT_THRESHOLD):
+    """
+    Restore a party from its snapshot and journal and attach a journal to it.
+    If there's no snapshot, a new party with a given name is created. Species
+    and backgrounds are taken from 'data' GameData object. If an interrupted
+    compaction left an old journal behind, a snapshot is written before the
+    old journal is removed.
+    """
+    snapshot_path = f"{base_path}{save.EXTENSION}"
+    old_journal_path = f"{base_path}.journal.old"
+    if os.path.exists(snapshot_path):
+        party, seq = save.load_snapshot(snapshot_path, data)
+    else:
+        party, seq = Party(name), 0
+    for entry_seq, change in _read_entries(old_journal_path):
+        if entry_seq > seq:
+            _apply(party, change, data)
+            seq = entry_seq
+    entries = 0
+    for entry_seq, change in _read_entries(f"{base_path}.journal"):
+        entries += 1
+        if entry_seq > seq:
+            _apply(party, change, data)
+            seq = entry_seq
+    if os.path.exists(old_journal_path):
+        save.save_party(snapshot_path, party, seq)
+        os.remove(old_journal_path)
+    journal = Journal(base_path, party, seq, threshold, entries)
+    if not os.path.exists(snapshot_path):
+        journal.compact()
+    return party
+
+
+#--------- helper things ---------#
+
+
+def _read_entries(path):
+    """
+    Iterate over (sequence number, change) pairs in a journal file. A truncated
+    last entry (left by a crash) is ignored.
+    """
+    try:
+        with open(path, "rb") as f:
+            contents = f.read()
+    except FileNotFoundError:
+        return
+    pos = 0
+    while pos + _LENGTH.size <= len(contents):
+        (length,) = _LENGTH.unpack_from(contents, pos)
+        pos += _LENGTH.size
+        if pos + length > len(contents):
+            return
+        yield marshal.loads(contents[pos:pos + length])
+        pos += length
+
+
+def _apply(party, change, data):
+    """ Apply a recorded change to a party. """
+    kind = change[0]
+    if kind == party_changes.PARTY_NAME:
+        party.set_name(change[1])
+        return
+    if kind == party_changes.ADD:
+        ident, name, aliases, species_id, bg_id = change[1:]
+        pc = PlayerCharacter(name, data.species_ids[species_id], data.background_ids[bg_id])
+        pc.aliases = dict.fromkeys(aliases)
+        party.add_character(pc, ident)
+        return
+    pc = party.members[change[1]]
+    args = change[2:]
+    if kind == party_changes.DELETE:
+        party.delete_character(pc)
+    elif kind == party_changes.NAME:
+        pc.set_name(*args)
+    elif kind == party_changes.SPECIES:
+        pc.change_species(data.species_ids[args[0]])
+    elif kind == party_changes.BACKGROUND:
+        pc.change_background(data.background_ids[args[0]])
+    elif kind == party_changes.ALIAS_ADDED:
+        pc.add_alias(*args)
+    elif kind == party_changes.ALIAS_REMOVED:
+        pc.remove_alias(*args)
+    elif kind == party_changes.ALIASES_RESET:
+        pc.reset_aliases()
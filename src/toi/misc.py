@@ -13,3 +13,15 @@ def normalize(string):
 def pretty_name(string):
     """ Make a name pretty: strip the whitespace and capitalize each word. """
     return " ".join(map(str.capitalize, normalize(string).split()))
+
+
+def name_index(things):
+    """
+    Return a dict mapping normalized names and shortnames of 'things' to the
+    things themselves. If several things share a name, the first one wins.
+    """
+    res = {}
+    for thing in things:
+        res.setdefault(normalize(thing.name), thing)
+        res.setdefault(normalize(thing.shortname), thing)
+    return res
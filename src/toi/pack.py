@@ -0,0 +1,94 @@
+"""
+Pack module.
+
+Provides Pack class used to read content packs - single files holding the
+contents of many game files - and 'write_pack' function to create them.
+
+A pack consists of a header (magic bytes, format version and the number of
+records), a table of records (name, offset and length of each record) and the
+records themselves - game files' contents serialized with 'marshal'. Packs are
+mapped into memory and the records are decoded on demand.
+"""
+
+
+import marshal
+import mmap
+import struct
+
+
+MAGIC = b"TOIPACK\0"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sHI")
+_NAME_LENGTH = struct.Struct("<H")
+_LOCATION = struct.Struct("<QQ")
+
+
+class Pack():
+    """ A content pack opened for reading. """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self.table = _read_table(self.buffer, path)
+
+    def __contains__(self, name):
+        return name in self.table
+
+    def __iter__(self):
+        return iter(self.table)
+
+    def close(self):
+        """ Unmap the pack. """
+        self.buffer.close()
+
+    def get(self, name):
+        """ Decode and return a record with a given name. """
+        offset, length = self.table[name]
+        return marshal.loads(self.buffer[offset:offset + length])
+
+
+def write_pack(path, records):
+    """
+    Write a pack to a given path. 'records' is a dict mapping record names to
+    marshallable objects.
+    """
+    names = sorted(records)
+    blobs = [marshal.dumps(records[name]) for name in names]
+    encoded_names = [name.encode("utf-8") for name in names]
+    table_size = sum(_NAME_LENGTH.size + len(name) + _LOCATION.size for name in encoded_names)
+    offset = _HEADER.size + table_size
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(names)))
+        for name, blob in zip(encoded_names, blobs):
+            f.write(_NAME_LENGTH.pack(len(name)))
+            f.write(name)
+            f.write(_LOCATION.pack(offset, len(blob)))
+            offset += len(blob)
+        for blob in blobs:
+            f.write(blob)
+
+
+#--------- helper things ---------#
+
+
+def _read_table(buffer, path):
+    """ Read the table of records of a pack. """
+    if len(buffer) < _HEADER.size:
+        raise RuntimeError(f"Not a content pack: '{path}'")
+    magic, version, count = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise RuntimeError(f"Not a content pack: '{path}'")
+    if version != VERSION:
+        raise RuntimeError(f"Unsupported content pack version {version}: '{path}'")
+    res = {}
+    pos = _HEADER.size
+    for _ in range(count):
+        (name_length,) = _NAME_LENGTH.unpack_from(buffer, pos)
+        pos += _NAME_LENGTH.size
+        name = bytes(buffer[pos:pos + name_length]).decode("utf-8")
+        pos += name_length
+        res[name] = _LOCATION.unpack_from(buffer, pos)
+        pos += _LOCATION.size
+    return res
@@ -0,0 +1,135 @@
+"""
+Packer module.
+
+Provides 'compile_pack' function (also runnable as 'python -m toi.packer
+OUTPUT') that reads every game file from the data roots, validates the files
+and writes them into a single content pack (see 'toi.pack'). The content pack
+in use (if any) is ignored, so a pack is always built from the source files.
+"""
+
+
+import sys
+
+
+import yaml
+
+
+import toi.background as bg
+import toi.commands as commands
+from toi.gamedata import CONTROL_FILES
+import toi.grammar as grammar
+from toi.help import Topic
+from toi.pack import write_pack
+import toi.read as read
+import toi.species as species
+
+
+def compile_pack(output):
+    """
+    Read, validate and pack all game files. Raise RuntimeError listing all the
+    problems found if any of the files is invalid.
+    """
+    records = {}
+    errors = []
+    for name in read.files(pack=False):
+        try:
+            contents = read.read(name, pack=False)
+        except (OSError, yaml.YAMLError) as e:
+            errors.append(f"{name}: {e}")
+            continue
+        errors.extend(map(lambda error: f"{name}: {error}", _validate(name, contents)))
+        records[name] = contents
+    if not errors:
+        errors.extend(_validate_commands(records))
+    if errors:
+        raise RuntimeError("Invalid game files:\n" + "\n".join(errors))
+    try:
+        write_pack(output, records)
+    except ValueError as e:
+        raise RuntimeError(f"Game files contain unsupported values: {e}") from e
+
+
+#--------- helper things ---------#
+
+
+def _validate(name, contents):
+    """ Return a list of problems with a game file. """
+    directory = name.split("/")[0]
+    if name == "data/backgrounds.yaml":
+        return _validate_each(contents, bg.Background)
+    if name == "data/species.yaml":
+        return _validate_each(contents, species.Species)
+    if directory == "control":
+        return _validate_control(contents)
+    if directory == "help":
+        return _validate_each(contents, Topic)
+    if directory == "strings":
+        return _validate_strings(contents)
+    return []
+
+
+def _validate_each(contents, constructor):
+    """ Try constructing an object from each entry of a data list. """
+    if not isinstance(contents, list):
+        return ["expected a list of entries"]
+    res = []
+    for i, entry in enumerate(contents):
+        try:
+            constructor(entry)
+        except (KeyError, TypeError, ValueError) as e:
+            res.append(f"entry {i + 1}: missing or invalid field {e}")
+    return res
+
+
+def _validate_commands(records):
+    """
+    Check that no two commands of a flow (see 'toi.commands') match the same
+    input, the commands being taken from all the control categories.
+    """
+    control = {}
+    for category, filename in CONTROL_FILES.items():
+        control[category] = records.get(f"control/{filename}", {})
+    res = []
+    for flow, flow_commands in commands.FLOWS.items():
+        try:
+            problems = commands.check(control, flow_commands)
+        except KeyError as e:
+            res.append(f"{flow}: missing command {e}")
+            continue
+        res.extend(map(lambda problem: f"{flow}: {problem}", problems))
+    return res
+
+
+def _validate_control(contents):
+    """ Try compiling every grammar of a control category. """
+    if not isinstance(contents, dict):
+        return ["expected a dict of commands"]
+    res = []
+    for key, alternatives in contents.items():
+        if not isinstance(alternatives, list):
+            res.append(f"'{key}': expected a list of alternatives")
+            continue
+        for string in alternatives:
+            try:
+                grammar.compile(string)
+            except (RuntimeError, TypeError) as e:
+                res.append(f"'{key}': {e}")
+    return res
+
+
+def _validate_strings(contents):
+    """ Check that a strings category maps strings to strings. """
+    if not isinstance(contents, dict):
+        return ["expected a dict of strings"]
+    return [f"'{key}': expected a string"
+            for key, value in contents.items()
+            if not isinstance(value, str)]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit(f"Usage: {sys.argv[0]} OUTPUT")
+    try:
+        compile_pack(sys.argv[1])
+    except RuntimeError as e:
+        sys.exit(str(e))
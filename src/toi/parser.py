@@ -1,44 +1,243 @@
 """
 Parser module.
 
-Provides 'make_parser' function to transform strings into parsers.
+Provides 'make_parser' function to transform strings into parsers,
+'Dispatcher' class to match input against several commands at once and 'parse'
+function to use the parsers.
+
+Parsers only depend on game data, so they are built once per GameData object:
+the parsers of the alternatives are shared by all the parsers and dispatchers
+using them. The player characters are looked up in the party of the game state
+given to 'parse' (or 'Dispatcher.parse').
+
+Parse results are memoized in a bounded LRU cache ('PARSE_CACHE'), keyed by the
+parser and the input string. The results of the parsers capturing player
+characters are also keyed by the serial number and the version of the party, so
+they become stale as soon as the party changes. The cache never refers to
+parties or characters: captured characters are stored by their ids and looked
+up in the party when a result is returned, so the parties of finished sessions
+are not kept alive by it.
 """
 
 
-from collections import deque
+from collections import OrderedDict, deque
+import contextvars
+import copy
 import enum
-from itertools import chain
+import weakref
 
 
 import epp
 
 
+from toi.fuzzy import FuzzyIndex, MAX_SUGGESTIONS, MIN_LENGTH, tolerance
+import toi.grammar as grammar
 import toi.misc as misc
 
 
+DEFAULT_CACHE_SIZE = 1024
+
+
 #--------- main things ---------#
 
 
-def make_parser(alternative_strings, game):
+def make_parser(alternative_strings, data):
     """
-    Create and return a parser that will be able to query 'game' GameState
-    object for data and which grammar will be given by 'alternative_strings'.
+    Create and return a parser that will be able to query 'data' GameData
+    object and which grammar will be given by 'alternative_strings'.
     """
     alternatives = deque()
+    uses_party = False
     for string in alternative_strings:
-        alternatives.append(_make_alternative(string, game))
-    return epp.branch(alternatives, save_iterator=False)
+        alternatives.append(_alternative(string, data))
+        uses_party = uses_party or _uses_party(grammar.compile(string))
+    parser = epp.branch(alternatives, save_iterator=False)
+    if uses_party:
+        _PARTY_PARSERS.add(parser)
+    return parser
 
 
-def parse(parser, inp):
+def parse(parser, inp, game=None):
     """
     Use a given parser on a given input string, return a SRDict on success,
-    None on failure.
+    None on failure. 'game' is the GameState object whose party player
+    characters are looked up in. The result is a copy of the cached one, so it
+    may be changed freely.
     """
-    output = epp.parse(epp.SRDict(), inp, parser)
+    key = (parser, inp, _party_key(parser, game))
+    output = PARSE_CACHE.get(key, _MISSING)
+    if output is _MISSING:
+        token = _GAME.set(game)
+        try:
+            output = epp.parse(epp.SRDict(), inp, parser)
+        finally:
+            _GAME.reset(token)
+        if output is not None:
+            output = _detach(output[0])
+        PARSE_CACHE.put(key, output)
     if output is None:
         return None
-    return output[0]
+    return _attach(output, game)
+
+
+class ParseCache():
+    """
+    A bounded LRU cache of parse results. Counts the lookups that found a
+    result (hits) and the ones that didn't (misses) to help choose the size.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        """ Create the cache holding up to 'maxsize' results (0 disables it). """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        """ Return the result for a key, or 'default' if there's none. """
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """ Store a result, evicting the least recently used one if full. """
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """ Drop all the results and reset the counters. """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def resize(self, maxsize):
+        """ Change the size of the cache, evicting the results that don't fit. """
+        self.maxsize = maxsize
+        while len(self.entries) > max(maxsize, 0):
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        """ Return a dict with the counters and the size of the cache. """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            }
+
+
+PARSE_CACHE = ParseCache()
+
+
+class Dispatcher():
+    """
+    A merged parser for a set of commands. The literal beginnings (heads, see
+    'grammar.heads') of all the alternatives of the commands are put into a
+    trie, so a single walk along the input finds the few alternatives that can
+    match it, and only those are tried - the most specific (longest) head
+    first, the command given first among the equally specific ones. For input
+    that matches none of them, the dispatcher can suggest the commands the
+    player might have meant.
+
+    The commands are expected not to match the same input (see
+    'toi.commands.check'), so only the heads that overlap need resolving: the
+    longer one wins.
+    """
+
+    def __init__(self, commands, data):
+        """
+        Create a dispatcher. 'commands' is an iterable of (key, alternative
+        strings) pairs in the order of priority, 'data' is a GameData object
+        to be queried.
+        """
+        self.keys = []
+        self.parsers = []
+        self.grammars = []
+        self.trie = _new_node()
+        for key, alternative_strings in commands:
+            for string in alternative_strings:
+                tokens = grammar.compile(string)
+                number = len(self.parsers)
+                parser = _alternative(string, data)
+                self.keys.append(key)
+                self.parsers.append(parser)
+                self.grammars.append(tokens)
+                for pieces, complete in grammar.heads(tokens):
+                    _trie_add(self.trie, pieces, complete, (len(pieces), key, number))
+        self.vocabulary = None
+
+    def candidates(self, inp):
+        """
+        Return the list of the numbers of the alternatives that may match an
+        input string, in the order they should be tried.
+        """
+        found = []
+        stack = [(self.trie, 0)]
+        length = len(inp)
+        while stack:
+            node, pos = stack.pop()
+            children, open_heads, complete_heads = node
+            found.extend(open_heads.values())
+            if pos == length:
+                found.extend(complete_heads.values())
+                continue
+            child = children.get(inp[pos])
+            if child is not None:
+                stack.append((child, pos + 1))
+            if inp[pos].isspace() and None in children:
+                end = pos + 1
+                while end < length and inp[end].isspace():
+                    end += 1
+                stack.append((children[None], end))
+        found.sort(key=lambda head: (-head[0], head[2]))
+        return list(dict.fromkeys(map(lambda head: head[2], found)))
+
+    def parse(self, inp, game=None):
+        """
+        Match an input string against the commands, looking player characters
+        up in the party of 'game' GameState. Return a (key, SRDict) pair on
+        success, None on failure.
+        """
+        for number in self.candidates(inp):
+            output = parse(self.parsers[number], inp, game)
+            if output is not None:
+                return self.keys[number], output
+        return None
+
+    def suggest(self, inp, limit=MAX_SUGGESTIONS):
+        """
+        Return a list of up to 'limit' commands (in plain words, see
+        'grammar.usage') whose leading literals are the closest to the
+        beginning of an input string, the closest first.
+        """
+        if self.vocabulary is None:
+            self.vocabulary = _make_vocabulary(self.grammars)
+        words = misc.normalize(inp).split()
+        found = []
+        for length, index in self.vocabulary.items():
+            if len(words) < length:
+                continue
+            start = " ".join(words[:length])
+            for dist, literal in index.search(start, tolerance(start)):
+                found.append((dist, index.values[literal]))
+        found.sort(key=lambda match: match[0])
+        res = []
+        for _, command in found:
+            if command not in res:
+                res.append(command)
+        return res[:limit]
 
 
 class Capture(enum.Enum):
@@ -49,169 +248,230 @@ class Capture(enum.Enum):
     PC = enum.auto()
     SPECIES = enum.auto()
     TOPIC = enum.auto()
+    UNKNOWN_BACKGROUND = enum.auto()
+    UNKNOWN_PC = enum.auto()
+    UNKNOWN_SPECIES = enum.auto()
 
 
 #--------- helper things ---------#
 
 
-def _make_alternative(string, game, require_eoi=True):
-    """ Create and return a parser from a particular grammar. """
-    white = _make_whitespace()
-    literal = _make_literal()
-    optional = _make_optional(game)
-    # capturing parsers
-    bg = _make_bg(game)
-    name = _make_name()
-    pc = _make_pc(game)
-    species = _make_species(game)
-    topic = _make_topic()
-    #
-    parsers = deque()
-    piece = epp.chain(
-        [epp.branch(
-            [# generic
-                white,
-                optional,
-                literal,
-                # captures
-                bg,
-                name,
-                pc,
-                species,
-                topic
-            ], save_iterator=False),
-         epp.effect(lambda val, st: parsers.append(val))],
-        save_iterator=False)
-    total = epp.many(piece, 1)
-    output = epp.parse(None, string, total)
-    if output is None:
-        raise RuntimeError(f"Failed to construct a parser from: '{string}'")
-    if require_eoi:
-        parsers.append(epp.end_of_input())
-    return epp.chain(parsers)
+_MISSING = object()
 
+# parsers of the alternatives, by game data and grammar string
+_ALTERNATIVES = weakref.WeakKeyDictionary()
 
-#--------- non-capturing parser generators ---------#
+# the game state being parsed for, queried by the PC captures
+_GAME = contextvars.ContextVar("game", default=None)
 
-def _make_literal():
-    """ Make a literal parser. """
-    predicate = lambda char: char not in ["[", "]", "{", "}"]
-    return epp.chain(
-        [epp.many(epp.cond_char(predicate), min_hits=1),
-         epp.effect(lambda val, st: epp.literal(st.parsed))],
-        save_iterator=False)
+# parsers whose results depend on the party
+_PARTY_PARSERS = weakref.WeakSet()
 
 
-def _make_optional(game):
-    """ Make an optional group parser. """
-    return epp.chain(
-        [epp.balanced("[", "]"),
-         epp.effect(lambda val, st: epp.maybe(_make_alternative(st.parsed, game, False)))],
-        save_iterator=False)
+def _alternative(string, data):
+    """
+    Return the parser of a single grammar string, making it the first time
+    it's asked for with given game data.
+    """
+    parsers = _ALTERNATIVES.setdefault(data, {})
+    try:
+        return parsers[string]
+    except KeyError:
+        pass
+    tokens = grammar.compile(string)
+    # the parsers are the values of a dict weakly keyed by 'data', so they
+    # must not hold it strongly
+    parser = _make_alternative(tokens, weakref.proxy(data))
+    if _uses_party(tokens):
+        _PARTY_PARSERS.add(parser)
+    parsers[string] = parser
+    return parser
+
+
+def _attach(output, game):
+    """
+    Return a copy of a cached result with the captured character id replaced
+    by the character from the party of 'game' GameState (see '_detach').
+    """
+    res = copy.copy(output)
+    if res.get(Capture.PC) is not None:
+        res[Capture.PC] = game.party.members[res[Capture.PC]]
+    return res
 
 
-def _make_whitespace():
-    """ Make a whitespace parser. """
-    output_parser = epp.whitespace(min_num=1)
-    return epp.chain(
-        [epp.whitespace(min_num=1),
-         epp.effect(lambda val, st: output_parser)],
-        save_iterator=False)
+def _current_party():
+    """ Return the party of the game state being parsed for, or None. """
+    return getattr(_GAME.get(), "party", None)
+
+
+def _detach(output):
+    """
+    Return a result fit for caching: the captured character (if any) is
+    replaced by its id.
+    """
+    if output.get(Capture.PC) is None:
+        return output
+    res = copy.copy(output)
+    res[Capture.PC] = res[Capture.PC].ident
+    return res
+
+
+def _party_key(parser, game):
+    """
+    Return the part of the cache key describing the state of the party a
+    parser depends on, or None if it doesn't depend on the party.
+    """
+    if parser not in _PARTY_PARSERS:
+        return None
+    party = getattr(game, "party", None)
+    if party is None:
+        return None
+    return (party.serial, party.version)
+
+
+def _uses_party(tokens):
+    """ Return True if a compiled grammar captures player characters. """
+    for token in tokens:
+        if token[0] == grammar.CAPTURE and token[1] == "pc":
+            return True
+        if token[0] == grammar.OPTIONAL and _uses_party(token[1]):
+            return True
+    return False
+
+
+def _make_vocabulary(grammars):
+    """
+    Make the indexes used to suggest commands: a dict mapping word counts to
+    FuzzyIndex objects, which map the leading literals of the grammars (with
+    and without the optional parts) having that many words to the grammars in
+    plain words. Literals too short to be told from typos are left out.
+    """
+    res = {}
+    for tokens in grammars:
+        command = grammar.usage(tokens)
+        for optional in (True, False):
+            literal = grammar.literal_prefix(tokens, optional)
+            if len(literal) < MIN_LENGTH:
+                continue
+            length = len(literal.split())
+            res.setdefault(length, FuzzyIndex()).add(literal, command)
+    return res
+
+
+def _new_node():
+    """
+    Make a dispatch trie node: a [children, open heads, complete heads] list.
+    Children are keyed by characters (None standing for whitespace), heads -
+    by alternative numbers, the value being a (head length, key, alternative
+    number) tuple.
+    """
+    return [{}, {}, {}]
+
+
+def _trie_add(root, pieces, complete, head):
+    """ Add a head to a dispatch trie. """
+    node = root
+    for piece in pieces:
+        node = node[0].setdefault(piece, _new_node())
+    node[2 if complete else 1][head[2]] = head
+
+
+def _make_alternative(tokens, data, require_eoi=True):
+    """ Create and return a parser from a compiled grammar. """
+    parsers = deque(map(lambda token: _make_piece(token, data), tokens))
+    if require_eoi:
+        parsers.append(epp.end_of_input())
+    return epp.chain(parsers)
+
+
+def _make_piece(token, data):
+    """ Create and return a parser for a single grammar token. """
+    kind = token[0]
+    if kind == grammar.WHITESPACE:
+        return epp.whitespace(min_num=1)
+    if kind == grammar.LITERAL:
+        return epp.literal(token[1])
+    if kind == grammar.OPTIONAL:
+        return epp.maybe(_make_alternative(token[1], data, False))
+    return _CAPTURES[token[1]](data)
 
 
 #--------- capturing parser generators ---------#
 
 
-def _make_bg(game):
+def _make_bg(data):
     """ Make a background parser. """
-    def variant(bg):
-        """ Make a parser for the background. """
-        fullname = epp.literal(misc.normalize(bg.name))
-        shortname = epp.literal(misc.normalize(bg.shortname))
-        eff = epp.effect(lambda val, st: val.update({Capture.BACKGROUND: bg}))
-        return epp.chain(
-            [epp.branch([fullname, shortname], save_iterator=False),
-             eff],
-            save_iterator=False)
-    catchall = epp.chain(
-        [epp.greedy(epp.everything()),
-         epp.effect(lambda val, st: val.update({Capture.BACKGROUND: None}))],
-        save_iterator=False)
-    total = chain(map(variant, game.data.backgrounds), [catchall])
-    output_parser = epp.branch(total)
-    return epp.chain(
-        [epp.literal("{bg}"),
-         epp.effect(lambda val, st: output_parser)],
-        save_iterator=False)
+    return _make_entity(
+        Capture.BACKGROUND, Capture.UNKNOWN_BACKGROUND,
+        lambda name: data.background_index.get(name))
 
 
-def _make_name():
+def _make_name(data):
     """ Make a name parser. """
-    output_parser = epp.chain(
+    return epp.chain(
         [epp.greedy(epp.everything()),
          epp.effect(lambda val, st: val.update({Capture.NAME: misc.normalize(st.parsed)}))],
         save_iterator=False)
-    return epp.chain(
-        [epp.literal("{name}"),
-         epp.effect(lambda val, st: output_parser)],
-        save_iterator=False)
 
 
-def _make_pc(game):
-    """ Make a PC name parser. """
-    def specific_pc_parser(pc):
-        """ Make a parser for a specific PC. """
-        name = epp.literal(misc.normalize(pc.name))
-        aliases = epp.multi(pc.aliases)
-        eff = epp.effect(lambda val, st: val.update({Capture.PC: pc}))
-        return epp.chain(
-            [epp.branch([name, aliases], save_iterator=False),
-             eff],
-            save_iterator=False)
-    def parser_generator():
-        """ Generate a PC parser. """
-        variants = map(specific_pc_parser, game.party.characters)
-        catchall = epp.chain(
-            [epp.greedy(epp.everything()),
-             epp.effect(lambda val, st: val.update({Capture.PC: None}))],
-            save_iterator=False)
-        return epp.branch(chain(variants, [catchall]))
-    return epp.chain(
-        [epp.literal("{pc}"),
-         epp.effect(lambda val, st: epp.lazy(parser_generator))],
-        save_iterator=False)
+def _make_pc(data):
+    """
+    Make a PC name parser. The PCs are looked up in the party of the game
+    state being parsed for.
+    """
+    def find(name):
+        """ Find a PC by name. """
+        party = _current_party()
+        if party is None:
+            return None
+        return party.find(name)
+    return _make_entity(Capture.PC, Capture.UNKNOWN_PC, find)
 
 
-def _make_species(game):
+def _make_species(data):
     """ Make a species parser. """
-    def variant(species):
-        """ Make a parser for the species. """
-        fullname = epp.literal(misc.normalize(species.name))
-        shortname = epp.literal(misc.normalize(species.shortname))
-        eff = epp.effect(lambda val, st: val.update({Capture.SPECIES: species}))
-        return epp.chain(
-            [epp.branch([fullname, shortname], save_iterator=False),
-             eff],
-            save_iterator=False)
-    catchall = epp.chain(
-        [epp.greedy(epp.everything()),
-         epp.effect(lambda val, st: val.update({Capture.SPECIES: None}))],
-        save_iterator=False)
-    total = chain(map(variant, game.data.species), [catchall])
-    output_parser = epp.branch(total)
-    return epp.chain(
-        [epp.literal("{species}"),
-         epp.effect(lambda val, st: output_parser)],
-        save_iterator=False)
+    return _make_entity(
+        Capture.SPECIES, Capture.UNKNOWN_SPECIES,
+        lambda name: data.species_index.get(name))
 
 
-def _make_topic():
+def _make_topic(data):
     """ Make a help/apropos topic parser. """
-    output_parser = epp.chain(
+    return epp.chain(
         [epp.greedy(epp.everything()),
          epp.effect(lambda val, st: val.update({Capture.TOPIC: misc.normalize(st.parsed)}))],
         save_iterator=False)
-    return epp.chain(
-        [epp.literal("{topic}"),
-         epp.effect(lambda val, st: output_parser)],
+
+
+def _make_entity(capture, unknown, find):
+    """
+    Make a parser that captures a thing by its normalized name, looking it up
+    with 'find' function, which should return None if there's no such thing.
+    In this case None is captured, and the normalized name is captured as
+    'unknown'.
+    """
+    def lookup(val, st):
+        """ Look up the parsed name. """
+        thing = find(misc.normalize(st.parsed))
+        if thing is None:
+            raise epp.ParsingFailure(f"Not a known name: '{st.parsed}'")
+        return val.update({capture: thing})
+    known = epp.chain(
+        [epp.greedy(epp.everything()),
+         epp.effect(lookup)],
         save_iterator=False)
+    catchall = epp.chain(
+        [epp.greedy(epp.everything()),
+         epp.effect(lambda val, st: val.update(
+             {capture: None, unknown: misc.normalize(st.parsed)}))],
+        save_iterator=False)
+    return epp.branch([known, catchall])
+
+
+_CAPTURES = {
+    "bg": _make_bg,
+    "name": _make_name,
+    "pc": _make_pc,
+    "species": _make_species,
+    "topic": _make_topic,
+    }
@@ -5,27 +5,145 @@ Provides Party class used to hold information about the player's party.
 """
 
 
-from collections import deque
+import itertools
 
 
 import toi.misc as misc
 
 
+# journal entry kinds
+ADD = "add"
+ALIAS_ADDED = "alias+"
+ALIAS_REMOVED = "alias-"
+ALIASES_RESET = "reset aliases"
+BACKGROUND = "bg"
+DELETE = "delete"
+NAME = "name"
+PARTY_NAME = "party name"
+SPECIES = "species"
+
+
 class Party():
     """
     A collection of characters and a holder for some party info.
+
+    Characters are kept in an insertion-ordered dict by their ids (assigned on
+    addition), and indexed by their normalized names and aliases, so that
+    addition, deletion and lookup by name take constant time.
+
+    If a journal (see 'toi.journal') is attached to the party, every change of
+    the party and of its characters is recorded in it.
+
+    Every party gets a serial number unique within the process, so that the
+    serial and the version identify the state of the party without referring
+    to it (see 'toi.parser').
     """
 
+    __slots__ = ("name", "members", "index", "next_id", "version", "journal", "serial")
+
     def __init__(self, name):
         self.name = name
-        self.characters = deque()
+        self.members = {}
+        self.index = {}
+        self.next_id = 0
+        self.version = 0
+        self.journal = None
+        self.serial = next(_SERIALS)
+
+    @property
+    def characters(self):
+        """ A view of the characters in the party, in order of addition. """
+        return self.members.values()
 
     #--------- character management ---------#
 
-    def add_character(self, char):
-        """ Add a character to the party. """
-        self.characters.append(char)
+    def add_character(self, char, ident=None):
+        """
+        Add a character to the party. Normally the character gets a fresh id,
+        but a specific one can be given (when restoring a saved party). Raise
+        ValueError if another character already has that id.
+        """
+        if ident is None:
+            ident = self.next_id
+        elif ident in self.members:
+            raise ValueError(f"Duplicate character id: {ident}")
+        char.ident = ident
+        self.next_id = max(self.next_id, ident + 1)
+        self.members[char.ident] = char
+        char.party = self
+        for key in char.names():
+            self._index_add(key, char)
+        self.version += 1
+        self.record(
+            ADD, char.ident, char.name, list(char.aliases),
+            char.species.ident, char.background.ident)
+
+    def character_changed(self, char, old_names):
+        """
+        Update the index after a name or an alias of a character was changed.
+        'old_names' is a set of names the character had before the change.
+        """
+        new_names = char.names()
+        for key in old_names - new_names:
+            self._index_remove(key, char)
+        for key in new_names - old_names:
+            self._index_add(key, char)
+        self.version += 1
 
     def delete_character(self, char):
         """ Delete a character from the party. """
-        self.characters = deque(filter(lambda c: c is not char, self.characters))
+        if self.members.get(char.ident) is not char:
+            return
+        del self.members[char.ident]
+        for key in char.names():
+            self._index_remove(key, char)
+        char.party = None
+        self.version += 1
+        self.record(DELETE, char.ident)
+
+    def find(self, name):
+        """
+        Return a character with a given name or alias (the one added first if
+        there are several), or None if there's no such character.
+        """
+        chars = self.index.get(misc.normalize(name))
+        if chars is None:
+            return None
+        return next(iter(chars.values()))
+
+    #--------- misc ---------#
+
+    def record(self, *entry):
+        """ Record a change in the journal, if there's one. """
+        if self.journal is not None:
+            self.journal.append(entry)
+
+    def set_name(self, name):
+        """ Set the name of the party. """
+        self.name = name
+        self.record(PARTY_NAME, name)
+
+    #--------- helper things ---------#
+
+    def _index_add(self, key, char):
+        """ Add a character to the index under a given key. """
+        chars = self.index.setdefault(key, {})
+        chars[char.ident] = char
+        if len(chars) > 1:
+            # keep the characters in order of addition
+            self.index[key] = dict(sorted(chars.items()))
+
+    def _index_remove(self, key, char):
+        """ Remove a character from the index under a given key. """
+        chars = self.index.get(key)
+        if chars is None:
+            return
+        chars.pop(char.ident, None)
+        if not chars:
+            del self.index[key]
+
+
+#--------- helper things ---------#
+
+
+_SERIALS = itertools.count()
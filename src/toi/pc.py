@@ -5,12 +5,10 @@ Provides PlayerCharacter.
 """
 
 
-from collections import deque
-
-
 import toi.cat as cat
 import toi.cat.pc as pc
 import toi.misc as misc
+import toi.party as party
 import toi.stats as stats
 
 
@@ -19,12 +17,17 @@ class PlayerCharacter():
     Information about a player character.
     """
 
+    __slots__ = ("name", "aliases", "ident", "party", "version", "species", "background", "stats")
+
     def __init__(self, name, species, background):
         self.name = None
-        self.aliases = deque()
+        self.aliases = {}
+        self.ident = None
+        self.party = None
+        self.version = 0
         self.species = species
         self.background = background
-        self.stats = {}
+        self.stats = None
         self._init_stats()
         self.apply_background_modifiers()
         self.set_name(name)
@@ -40,6 +43,7 @@ class PlayerCharacter():
         self._init_stats()
         self.background = new_bg
         self.apply_background_modifiers()
+        self._record(party.BACKGROUND, new_bg.ident)
 
 
     #--------- species manipulation ---------#
@@ -49,11 +53,12 @@ class PlayerCharacter():
         self.species = species
         self._init_stats()
         self.apply_background_modifiers()
+        self._record(party.SPECIES, species.ident)
 
     #--------- stat manipulation ---------#
 
     def _init_stats(self):
-        """ Initialize statistics dict. """
+        """ Initialize statistics block. """
         self.stats = self.species.base_stats.copy()
 
     #--------- information retrieval ---------#
@@ -70,25 +75,60 @@ class PlayerCharacter():
             )
 
 
+    def names(self):
+        """ Return a set of normalized name and aliases of the character. """
+        res = set(self.aliases)
+        if self.name is not None:
+            res.add(misc.normalize(self.name))
+        return res
+
     #--------- misc ---------#
 
     def add_alias(self, alias):
         """ Add an alias for the PC. """
-        self.aliases.append(misc.normalize(alias))
+        old_names = self.names()
+        alias = misc.normalize(alias)
+        self.aliases[alias] = None
+        self._names_changed(old_names)
+        self._record(party.ALIAS_ADDED, alias)
 
     def remove_alias(self, alias):
         """ Remove an alias. """
-        self.aliases = deque(filter(lambda a: a != alias, self.aliases))
+        old_names = self.names()
+        alias = misc.normalize(alias)
+        self.aliases.pop(alias, None)
+        self._names_changed(old_names)
+        self._record(party.ALIAS_REMOVED, alias)
 
     def reset_aliases(self):
         """ Reset the aliases list just to defaults. """
+        old_names = self.names()
         self.aliases.clear()
-        self.aliases.append(misc.normalize(self.name.split()[0]))
+        self.aliases[misc.normalize(self.name.split()[0])] = None
+        self._names_changed(old_names)
+        self._record(party.ALIASES_RESET)
 
     def set_name(self, name):
         """ Set the name of the character and add a default alias. """
+        old_names = self.names()
         if self.name is not None:
-            self.remove_alias(misc.normalize(self.name).split()[0])
-        alias = name.split()[0]
-        self.add_alias(alias)
+            self.aliases.pop(misc.normalize(self.name).split()[0], None)
+        self.aliases[misc.normalize(name.split()[0])] = None
         self.name = name
+        self._names_changed(old_names)
+        self._record(party.NAME, name)
+
+    def _names_changed(self, old_names):
+        """
+        Bump the version of the character and update its party after its name
+        or aliases were changed. 'old_names' is the set of names the character
+        had before the change.
+        """
+        self.version += 1
+        if self.party is not None:
+            self.party.character_changed(self, old_names)
+
+    def _record(self, kind, *args):
+        """ Record a change of the character in its party's journal. """
+        if self.party is not None:
+            self.party.record(kind, self.ident, *args)
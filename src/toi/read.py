@@ -5,30 +5,189 @@ Read module.
 Provides a function to read data from YAML files that searches for such a file
 in several locations.
 
+The locations (data roots) are resolved once per process: the user overlay roots
+given by the TOI_OVERLAYS environment variable (separated by os.pathsep, highest
+priority first) or by 'set_overlays' function come first, then the default
+roots - './', '../' and '/usr/share/toi'. Content directories of all the roots
+are scanned once to build an index of the available files, so a file from an
+overlay shadows the file with the same name from the roots below it.
+
+If a content pack (see 'toi.pack') is given by the TOI_PACK environment variable
+or by 'use_pack' function, the files it contains are read from the pack rather
+than from the data roots.
+
+Parsed files are kept in the on-disk cache (see 'toi.cache'), validated by the
+modification time and the size of the source file, so unchanged files are not
+parsed again.
+
 """
 
+import hashlib
 from pathlib import Path
+import os
 import yaml
 
 
-def read(*filename):
-    """ Read a YAML file. """
-    f = Path(*filename)
-    try:
-        return _try_read(f)
-    except FileNotFoundError:
-        pass
+import toi.cache as cache
+from toi.pack import Pack
+
+
+try:
+    _Loader = yaml.CSafeLoader
+except AttributeError:
+    _Loader = yaml.SafeLoader
+
+
+CONTENT_DIRS = ["control", "data", "help", "strings"]
+DEFAULT_ROOTS = [Path("."), Path(".."), Path("/", "usr", "share", "toi")]
+
+
+def read(*filename, pack=True):
+    """
+    Read a YAML file. The content pack in use (if any) is only consulted if
+    'pack' is True, otherwise the file is read from the data roots.
+    """
+    pack = _pack() if pack else None
+    if pack is not None:
+        key = Path(*filename).as_posix()
+        if key in pack:
+            return pack.get(key)
+    return _try_read(find(*filename))
+
+
+def files(content_dir=None, pack=True):
+    """
+    Return a sorted list of game files available in the content pack (unless
+    'pack' is False) and the data roots, optionally only the ones from a given
+    content directory.
+    """
+    res = set(_file_index())
+    pack = _pack() if pack else None
+    if pack is not None:
+        res.update(pack)
+    if content_dir is not None:
+        res = filter(lambda name: name.split("/")[0] == content_dir, res)
+    return sorted(res)
+
+
+def find(*filename):
+    """
+    Return the path to a game file given its path relative to a data root.
+    Raise FileNotFoundError if there's no such file in any of the roots.
+    """
+    key = Path(*filename).as_posix()
     try:
-        return _try_read(".." / f)
-    except FileNotFoundError:
-        pass
-    return _try_read(Path("/", "usr", "share", "toi", f))
+        return _file_index()[key]
+    except KeyError:
+        raise FileNotFoundError(f"No such game file: '{key}'") from None
+
+
+def roots():
+    """ Return the list of data roots, highest priority first. """
+    global _ROOTS
+    if _ROOTS is None:
+        overlays = os.environ.get("TOI_OVERLAYS", "")
+        overlays = [Path(root) for root in overlays.split(os.pathsep) if root]
+        _ROOTS = _resolve_roots(overlays)
+    return _ROOTS
+
+
+def set_overlays(overlays):
+    """
+    Set the overlay roots (highest priority first), replacing the ones given by
+    TOI_OVERLAYS environment variable, and rebuild the file index.
+    """
+    global _ROOTS, _INDEX
+    _ROOTS = _resolve_roots(map(Path, overlays))
+    _INDEX = None
+
+
+def use_pack(path):
+    """
+    Read game files from a content pack at a given path, replacing the one
+    given by TOI_PACK environment variable. None means no pack.
+    """
+    global _PACK
+    if isinstance(_PACK, Pack):
+        _PACK.close()
+    _PACK = None if path is None else Pack(path)
+
+
+#--------- helper things ---------#
+
+
+_ROOTS = None
+_INDEX = None
+_UNSET = object()
+_PACK = _UNSET
+
+
+def _pack():
+    """ Return the content pack in use (if any), opening it if necessary. """
+    global _PACK
+    if _PACK is _UNSET:
+        path = os.environ.get("TOI_PACK")
+        _PACK = Pack(path) if path else None
+    return _PACK
+
+
+def _resolve_roots(overlays):
+    """ Return a list of existing overlay and default roots as absolute paths. """
+    res = []
+    for root in [*overlays, *DEFAULT_ROOTS]:
+        root = root.resolve()
+        if root.is_dir() and root not in res:
+            res.append(root)
+    return res
+
+
+def _file_index():
+    """ Return the index of game files, building it if necessary. """
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = _scan(roots())
+    return _INDEX
+
+
+def _scan(root_list):
+    """
+    Scan the content directories of given roots and return a dict mapping
+    relative file paths to the actual paths.
+    """
+    res = {}
+    for root in reversed(root_list):
+        for content_dir in CONTENT_DIRS:
+            for dirpath, _, filenames in os.walk(root / content_dir):
+                for filename in filenames:
+                    path = Path(dirpath, filename)
+                    res[path.relative_to(root).as_posix()] = path
+    return res
 
 
 def _try_read(path):
-    """ Try reading a YAML file. """
+    """ Try reading a YAML file, using the cached contents if possible. """
+    stat = os.stat(path)
+    cache_name = _cache_name(path)
+    cached = cache.load(cache_name)
+    if (isinstance(cached, dict)
+            and cached.get("mtime") == stat.st_mtime_ns
+            and cached.get("size") == stat.st_size):
+        return cached["data"]
+    res = _parse(path)
+    cache.store(cache_name, {"mtime": stat.st_mtime_ns, "size": stat.st_size, "data": res})
+    return res
+
+
+def _parse(path):
+    """ Parse a YAML file. """
     with open(path) as f:
-        res = yaml.safe_load(f)
+        res = yaml.load(f, Loader=_Loader)
         if res is None:
             return {}
         return res
+
+
+def _cache_name(path):
+    """ Return the name of the cache entry for a given file. """
+    digest = hashlib.sha1(os.fsencode(os.path.abspath(path))).hexdigest()
+    return f"yaml-{digest}"
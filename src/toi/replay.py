@@ -0,0 +1,158 @@
+"""
+Replay module.
+
+Provides Recorder class used to record a game session as a transcript and
+'replay' coroutine to run a recorded session again at full speed, with the
+inputs taken from the transcript, and compare the outcome to the original.
+
+A transcript is a list of events, each a tuple of strings:
+- (SAY, line) for a line of output,
+- (ASK, line) for a line of input,
+- (ENTER, flow, entry point) when a flow entry point is called,
+- (END, flow, entry point) when a flow ends.
+
+Transcripts are stored as JSON, one event per line.
+
+Usage: python -m toi.replay TRANSCRIPT...
+"""
+
+
+import asyncio
+import difflib
+from io import StringIO
+import json
+import sys
+import time
+
+
+from toi.gamedata import GameData
+from toi.gameio import ScriptedIO
+from toi.misc import normalize
+import toi.stage.runner as runner
+import toi.stage.startup as start
+
+
+ASK = "ask"
+END = runner.END
+ENTER = runner.ENTER
+SAY = "say"
+
+
+class Recorder():
+    """
+    IO handler wrapper that records everything said and asked through it, and
+    the flow transitions observed while it's installed.
+    """
+
+    def __init__(self, io):
+        self.io = io
+        self.events = []
+
+    def __getattr__(self, name):
+        return getattr(self.io, name)
+
+    def say(self, *things):
+        """ Record the output lines and pass them on. """
+        for line in "".join(map(str, things)).splitlines():
+            self.events.append((SAY, line.strip()))
+        self.io.say(*things)
+
+    async def ask(self, prompt, do_normalize=False):
+        """ Request user input and record it (as inputted, not normalized). """
+        inp = await self.io.ask(prompt)
+        self.events.append((ASK, inp))
+        if do_normalize:
+            inp = normalize(inp)
+        return inp
+
+    def install(self):
+        """ Start observing flows executed in the current context. """
+        runner.observe(self.observe)
+
+    def observe(self, kind, flow, entry_point):
+        """ Record a flow transition. """
+        self.events.append((kind, type(flow).__name__, entry_point))
+
+    def save(self, path):
+        """ Write the transcript to a file. """
+        write_transcript(path, self.events)
+
+
+async def record(io, data):
+    """
+    Run a game session recording it. Return the transcript, which is complete
+    even if the session ended with EOFError (the player leaving).
+    """
+    recorder = Recorder(io)
+    recorder.install()
+    try:
+        await runner.execute(start.StartupFlow(recorder, data), start.ENTRY_POINT)
+    except EOFError:
+        pass
+    finally:
+        runner.observe(None)
+    return recorder.events
+
+
+async def replay(transcript, data):
+    """
+    Run a session again with the inputs from a transcript. Return the new
+    transcript.
+    """
+    commands = [event[1] for event in transcript if event[0] == ASK]
+    return await record(ScriptedIO(commands, StringIO()), data)
+
+
+def diff(expected, actual, expected_name="expected", actual_name="actual"):
+    """ Return the differences between two transcripts as a unified diff. """
+    return "".join(difflib.unified_diff(
+        list(map(_render, expected)), list(map(_render, actual)),
+        expected_name, actual_name))
+
+
+def read_transcript(path):
+    """ Read a transcript from a file. """
+    with open(path) as f:
+        return [tuple(json.loads(line)) for line in f if line.strip()]
+
+
+def write_transcript(path, transcript):
+    """ Write a transcript to a file. """
+    with open(path, "w") as f:
+        for event in transcript:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+
+async def check(paths, data):
+    """
+    Replay transcripts concurrently. Return a list of (path, diff, seconds)
+    tuples, where the diff is empty if the replay matched the transcript.
+    """
+    async def check_one(path):
+        """ Replay a single transcript. """
+        transcript = read_transcript(path)
+        started = time.perf_counter()
+        actual = await replay(transcript, data)
+        seconds = time.perf_counter() - started
+        return path, diff(transcript, actual, path, "replay"), seconds
+    return await asyncio.gather(*map(check_one, paths))
+
+
+#--------- helper things ---------#
+
+
+def _render(event):
+    """ Render an event as a line of a diff. """
+    return " ".join(event) + "\n"
+
+
+if __name__ == "__main__":
+    results = asyncio.run(check(sys.argv[1:], GameData()))
+    failed = False
+    for path, differences, seconds in results:
+        status = "ok" if not differences else "DIFFERS"
+        print(f"{path}: {status} ({seconds * 1000:.1f} ms)")
+        if differences:
+            failed = True
+            sys.stdout.write(differences)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,153 @@
+"""
+Roster module.
+
+Provides 'read_roster' function to create player characters in bulk from a
+roster file - a CSV file with 'name', 'species' and 'background' columns or a
+YAML file with a list of dicts with such keys.
+
+Rosters are meant for making test parties (QA and load-test fixtures), so they
+are imported offline, into a saved party (a snapshot and its journal, see
+'toi.journal'), rather than from the game: the players never get to name the
+files to read.
+
+Usage: python -m toi.roster ROSTER SAVE [--party-name NAME]
+"""
+
+
+import argparse
+import csv
+from pathlib import Path
+import sys
+
+
+import yaml
+
+
+from toi.gamedata import GameData
+import toi.journal as journal
+import toi.misc as misc
+from toi.pc import PlayerCharacter
+import toi.save as save
+
+
+NAME = "name"
+SPECIES = "species"
+BACKGROUND = "background"
+
+# error kinds
+BAD_ROW = "bad row"
+NO_NAME = "no name"
+UNKNOWN_BG = "unknown bg"
+UNKNOWN_SPECIES = "unknown species"
+UNREADABLE = "unreadable"
+
+
+def read_roster(path, data):
+    """
+    Read a roster file and create a character for each of its rows, using
+    species and backgrounds from 'data' GameData object. Return a pair of lists:
+    the characters and the problems found. Each problem is a (row number, error
+    kind, offending value) tuple, the row number being 0 for problems with the
+    file as a whole.
+    """
+    try:
+        rows = _read_rows(Path(path))
+    except (OSError, UnicodeDecodeError, csv.Error, yaml.YAMLError) as e:
+        return [], [(0, UNREADABLE, str(e))]
+    if not isinstance(rows, list):
+        return [], [(0, UNREADABLE, str(path))]
+    characters = []
+    errors = []
+    for i, row in enumerate(rows, 1):
+        char, row_errors = _make_character(row, data)
+        errors.extend(map(lambda error: (i, *error), row_errors))
+        if char is not None:
+            characters.append(char)
+    return characters, errors
+
+
+def import_roster(roster_path, save_path, data, party_name=None):
+    """
+    Add the characters from a roster file to the party saved in 'save_path'
+    (its extension may be left out), creating the party (named 'party_name')
+    if there's no such party yet. The party is restored from its snapshot and
+    journal, and a new snapshot is written afterwards. If the roster has any
+    problems, nobody is added and nothing is written. Return the list of the
+    problems (see 'read_roster').
+    """
+    characters, errors = read_roster(roster_path, data)
+    if errors:
+        return errors
+    base_path = save_path
+    if base_path.endswith(save.EXTENSION):
+        base_path = base_path[:-len(save.EXTENSION)]
+    party = journal.open_party(base_path, data, party_name or Path(base_path).name)
+    try:
+        if party_name is not None and party.name != party_name:
+            party.set_name(party_name)
+        for pc in characters:
+            party.add_character(pc)
+        party.journal.compact()
+    finally:
+        party.journal.close()
+    return []
+
+
+def main():
+    """ Import a roster given on the command line. """
+    args = _parse_args()
+    errors = import_roster(args.roster, args.save, GameData(), args.party_name)
+    for row, kind, value in errors:
+        print(f"{args.roster}:{row}: {kind}: {value}", file=sys.stderr)
+    sys.exit(1 if errors else 0)
+
+
+#--------- helper things ---------#
+
+
+def _make_character(row, data):
+    """
+    Make a character from a roster row. Return the character (or None) and a
+    list of (error kind, value) pairs.
+    """
+    if not isinstance(row, dict):
+        return None, [(BAD_ROW, str(row))]
+    errors = []
+    name = misc.pretty_name(str(row.get(NAME) or ""))
+    if name == "":
+        errors.append((NO_NAME, ""))
+    species_name = str(row.get(SPECIES) or "")
+    species = data.species_index.get(misc.normalize(species_name))
+    if species is None:
+        errors.append((UNKNOWN_SPECIES, species_name))
+    bg_name = str(row.get(BACKGROUND) or "")
+    bg = data.background_index.get(misc.normalize(bg_name))
+    if bg is None:
+        errors.append((UNKNOWN_BG, bg_name))
+    if errors:
+        return None, errors
+    return PlayerCharacter(name, species, bg), []
+
+
+def _read_rows(path):
+    """ Read the rows of a roster file. """
+    if path.suffix.lower() in (".yaml", ".yml"):
+        with open(path) as f:
+            return yaml.safe_load(f)
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f, skipinitialspace=True))
+
+
+def _parse_args():
+    """ Parse command line arguments. """
+    parser = argparse.ArgumentParser(
+        description="Add the characters from a roster file to a saved party.")
+    parser.add_argument("roster", help="CSV or YAML roster file")
+    parser.add_argument("save", help="saved party, created if it doesn't exist")
+    parser.add_argument("--party-name",
+                        help="name of the party (default: the save file name)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Save module.
+
+Provides functions to save a party to a file and to restore it, and to list the
+saved parties reading only the headers of the save files.
+
+A save file consists of a fixed-size preamble (magic bytes, format version and
+the header length), a header with a short summary of the party and a body with
+the characters. Both the header and the body are serialized with 'marshal'.
+Species and backgrounds are stored by their ids.
+"""
+
+
+import marshal
+import os
+from pathlib import Path
+import struct
+import time
+
+
+from toi.party import Party
+from toi.pc import PlayerCharacter
+
+
+MAGIC = b"TOISAVE\0"
+VERSION = 1
+EXTENSION = ".save"
+
+_PREAMBLE = struct.Struct("<8sHI")
+
+
+class SaveInfo():
+    """ A summary of a save file, read from its header. """
+
+    def __init__(self, path, header):
+        self.path = path
+        self.party_name = header["party"]
+        self.names = header["names"]
+        self.saved = header["saved"]
+
+
+def save_party(path, party, seq=0):
+    """
+    Save a party to a file, replacing it atomically. 'seq' is the sequence
+    number of the last journal entry reflected in the party (see
+    'toi.journal').
+    """
+    write_file(path, dump_party(party, seq))
+
+
+def dump_party(party, seq=0):
+    """ Return the contents of a save file for a party. """
+    characters = [
+        (pc.ident, pc.name, list(pc.aliases), pc.species.ident, pc.background.ident)
+        for pc in party.characters]
+    header = marshal.dumps({
+        "party": party.name,
+        "names": [pc.name for pc in party.characters],
+        "saved": time.time(),
+        })
+    body = marshal.dumps({
+        "next id": party.next_id,
+        "characters": characters,
+        "seq": seq,
+        })
+    return _PREAMBLE.pack(MAGIC, VERSION, len(header)) + header + body
+
+
+def write_file(path, contents):
+    """ Write the contents of a save file, replacing the file atomically. """
+    temp = Path(f"{path}.{os.getpid()}.tmp")
+    with open(temp, "wb") as f:
+        f.write(contents)
+    os.replace(temp, path)
+
+
+def read_header(path):
+    """ Read the header of a save file and return a SaveInfo object. """
+    with open(path, "rb") as f:
+        header_length = _read_preamble(f, path)
+        return SaveInfo(path, marshal.loads(f.read(header_length)))
+
+
+def list_saves(directory):
+    """
+    Return a list of SaveInfo objects for save files in a directory, most
+    recent first. Unreadable files are skipped.
+    """
+    res = []
+    for path in Path(directory).glob(f"*{EXTENSION}"):
+        try:
+            res.append(read_header(path))
+        except (OSError, EOFError, ValueError, TypeError, KeyError, RuntimeError):
+            continue
+    res.sort(key=lambda info: info.saved, reverse=True)
+    return res
+
+
+def load_party(path, data):
+    """
+    Restore a party from a file, taking species and backgrounds from 'data'
+    GameData object.
+    """
+    return load_snapshot(path, data)[0]
+
+
+def load_snapshot(path, data):
+    """
+    Restore a party from a file like 'load_party' does. Return the party and
+    the journal sequence number it was saved with.
+    """
+    with open(path, "rb") as f:
+        header_length = _read_preamble(f, path)
+        header = marshal.loads(f.read(header_length))
+        body = marshal.loads(f.read())
+    party = Party(header["party"])
+    for ident, name, aliases, species_id, bg_id in body["characters"]:
+        species = _lookup(data.species_ids, species_id, "species", path)
+        bg = _lookup(data.background_ids, bg_id, "background", path)
+        pc = PlayerCharacter(name, species, bg)
+        pc.aliases = dict.fromkeys(aliases)
+        try:
+            party.add_character(pc, ident)
+        except ValueError:
+            raise RuntimeError(
+                f"Duplicate character id '{ident}' in save file '{path}'") from None
+    party.next_id = max(party.next_id, body["next id"])
+    return party, body.get("seq", 0)
+
+
+#--------- helper things ---------#
+
+
+def _lookup(things, ident, kind, path):
+    """ Find a thing by its id, raise RuntimeError if there's no such thing. """
+    try:
+        return things[ident]
+    except KeyError:
+        raise RuntimeError(f"Unknown {kind} '{ident}' in save file '{path}'") from None
+
+
+def _read_preamble(f, path):
+    """ Check the preamble of a save file, return the length of the header. """
+    preamble = f.read(_PREAMBLE.size)
+    if len(preamble) != _PREAMBLE.size:
+        raise RuntimeError(f"Not a save file: '{path}'")
+    magic, version, header_length = _PREAMBLE.unpack(preamble)
+    if magic != MAGIC:
+        raise RuntimeError(f"Not a save file: '{path}'")
+    if version != VERSION:
+        raise RuntimeError(f"Unsupported save file version {version}: '{path}'")
+    return header_length
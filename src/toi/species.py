@@ -6,13 +6,17 @@ Provides Species class.
 
 
 import toi.cat.species as cat
+import toi.misc as misc
 import toi.stats as stats
 
 
 class Species():
     """ A class representing playable species. """
 
+    __slots__ = ("ident", "name", "shortname", "base_stats")
+
     def __init__(self, data):
+        self.ident = _read_ident(data)
         self.name = _read_name(data)
         self.shortname = _read_shortname(data)
         self.base_stats = _read_base_stats(data)
@@ -23,13 +27,21 @@ class Species():
 
 def _read_base_stats(data):
     """ Read base statistics for a species from a dictionary. """
-    res = {}
+    res = stats.StatBlock()
     source_keys = [cat.STR, cat.DEX, cat.INT, cat.SPI, cat.CHA, cat.LUC]
     for target_key, source_key in zip(stats.Stat, source_keys):
         res[target_key] = data[source_key]
     return res
 
 
+def _read_ident(data):
+    """
+    Read a stable species id from a dictionary. If there is none, the
+    normalized name is used.
+    """
+    return data.get(cat.ID) or misc.normalize(data[cat.NAME])
+
+
 def _read_name(data):
     """ Read species name from a dictionary. """
     return data[cat.NAME]
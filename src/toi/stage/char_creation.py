@@ -11,8 +11,9 @@ import mofloc
 import toi.cat as cat
 import toi.cat.common as common
 import toi.cat.char_creation as char
+import toi.commands as commands
 import toi.misc as misc
-from toi.parser import make_parser, Capture, parse
+from toi.parser import Capture
 from toi.pc import PlayerCharacter
 import toi.stage.common as cstage
 
@@ -28,7 +29,17 @@ class CharCreationFlow(cstage.FlowWithHelp):
         super().__init__(io, data, game)
         self.register_entry_point(CREATE_NEW, self.create_new)
         self.register_entry_point(EDIT_EXISTING, self.edit_existing)
-        self.parsers = self.prepare_parsers()
+        self.actions[common.CMD_ABORT] = self.do_abort
+        self.actions[common.CMD_APROPOS] = self.do_apropos
+        self.actions[common.CMD_HELP] = self.do_help
+        self.actions[char.CMD_DONE] = self.do_done
+        self.actions[char.CMD_LIST_BGS] = self.do_list_bgs
+        self.actions[char.CMD_LIST_SPECIES] = self.do_list_species
+        self.actions[char.CMD_OVERVIEW] = self.do_overview
+        self.actions[char.CMD_SET_BG] = self.do_set_bg
+        self.actions[char.CMD_SET_NAME] = self.do_set_name
+        self.actions[char.CMD_SET_SPECIES] = self.do_set_species
+        self.dispatcher = self.prepare_dispatcher()
         self.name = None
         self.background = None
         self.species = None
@@ -36,41 +47,17 @@ class CharCreationFlow(cstage.FlowWithHelp):
 
     #--------- helper things ---------#
 
-    def main_loop(self):
+    async def main_loop(self):
         """ The main processing loop shared by both entry points. """
         while True:
-            inp = self.io.ask(self.data.strings[cat.CHAR_CREATION][char.PROMPT])
-            if self.try_help(inp):
+            inp = await self.io.ask(self.data.strings[cat.CHAR_CREATION][char.PROMPT])
+            if await self.dispatch(inp):
                 continue
-            self.try_abort(inp)
-            if self.try_done(inp):
-                continue
-            if self.try_list_bgs(inp):
-                continue
-            if self.try_list_species(inp):
-                continue
-            if self.try_overview(inp):
-                continue
-            if self.try_set_bg(inp):
-                continue
-            if self.try_set_name(inp):
-                continue
-            if self.try_set_species(inp):
-                continue
-            self.io.say(self.data.strings[cat.COMMON][common.WHAT])
-
-    def prepare_parsers(self):
-        """ Prepare parsers used in character creation actions. """
-        res = {}
-        control = self.data.control[cat.CHAR_CREATION]
-        res[char.CMD_DONE] = make_parser(control[char.CMD_DONE], self.game)
-        res[char.CMD_LIST_BGS] = make_parser(control[char.CMD_LIST_BGS], self.game)
-        res[char.CMD_LIST_SPECIES] = make_parser(control[char.CMD_LIST_SPECIES], self.game)
-        res[char.CMD_OVERVIEW] = make_parser(control[char.CMD_OVERVIEW], self.game)
-        res[char.CMD_SET_BG] = make_parser(control[char.CMD_SET_BG], self.game)
-        res[char.CMD_SET_NAME] = make_parser(control[char.CMD_SET_NAME], self.game)
-        res[char.CMD_SET_SPECIES] = make_parser(control[char.CMD_SET_SPECIES], self.game)
-        return res
+            self.say_what(inp)
+
+    def prepare_dispatcher(self):
+        """ Prepare the dispatcher used in character creation actions. """
+        return self.make_dispatcher(commands.CHAR_CREATION)
 
     def overview(self):
         """ Return the overview string. """
@@ -88,14 +75,14 @@ class CharCreationFlow(cstage.FlowWithHelp):
 
     #--------- entry points ---------#
 
-    def create_new(self):
+    async def create_new(self):
         """ Create a new character. """
         self.io.say(self.data.strings[cat.CHAR_CREATION][char.GREETING_NEW])
         self.pc = None
-        self.name = self.read_name()
-        self.main_loop()
+        self.name = await self.read_name()
+        await self.main_loop()
 
-    def edit_existing(self, pc):
+    async def edit_existing(self, pc):
         """ Edit an existing character. """
         self.pc = pc
         self.name = pc.name
@@ -104,57 +91,45 @@ class CharCreationFlow(cstage.FlowWithHelp):
         msg = self.data.strings[cat.CHAR_CREATION][char.GREETING_EDIT]
         msg = msg.format(overview=self.overview())
         self.io.say(msg)
-        self.main_loop()
+        await self.main_loop()
 
     #--------- actions ---------#
 
-    def read_name(self):
+    async def read_name(self):
         """ Read and return the name of the party. """
         while True:
-            name = self.io.ask(self.data.strings[cat.CHAR_CREATION][char.NAME_PROMPT])
+            name = await self.io.ask(self.data.strings[cat.CHAR_CREATION][char.NAME_PROMPT])
             name = misc.normalize(name)
             if name == "":
                 continue
             return misc.pretty_name(name)
 
-    def try_abort(self, user_input):
-        """
-        If 'user_input' is an 'abort' command invokation, end the flow.
-        Otherwise return False.
-        """
-        output = parse(self.game.common_parsers[common.CMD_ABORT], user_input)
-        if output is None:
-            return False
+    async def do_abort(self, output):
+        """ Discard the character and end the flow. """
         self.io.say(self.data.strings[cat.COMMON][common.OKAY])
         raise mofloc.EndFlow
 
-    def try_done(self, user_input):
+    async def do_done(self, output):
         """
-        If 'user_input' is a 'done' command invokation, add the generated
-        character to the party and end the flow - if the information is
-        complete and background and species were selected. If some info is
-        missing, say so and return True.
-
-        Otherwise, return False.
+        Add the generated character to the party and end the flow - if the
+        information is complete and background and species were selected. If
+        some info is missing, say so.
         """
-        output = parse(self.parsers[char.CMD_DONE], user_input)
-        if output is None:
-            return False
         if self.background is None:
             self.io.say(self.data.strings[cat.CHAR_CREATION][char.SELECT_BG])
-            return True
+            return
         if self.species is None:
             self.io.say(self.data.strings[cat.CHAR_CREATION][char.SELECT_SPECIES])
-            return True
+            return
         prompt = self.data.strings[cat.CHAR_CREATION][char.IS_OK_PROMPT]
         prompt = prompt.format(overview=self.overview())
-        response = cstage.yesno(
+        response = await cstage.yesno(
             prompt,
             self.data.strings[cat.COMMON][common.JUST_YESNO],
             self.game.common_parsers,
             self.io)
         if response is cstage.Response.NO:
-            return True
+            return
         if self.pc is None:
             player = PlayerCharacter(self.name, self.species, self.background)
             self.game.party.add_character(player)
@@ -164,84 +139,46 @@ class CharCreationFlow(cstage.FlowWithHelp):
             self.pc.change_background(self.background)
         raise mofloc.EndFlow
 
-    def try_list_bgs(self, user_input):
-        """
-        If 'user_input' is a 'list bgs' command invokation, list available
-        backgrounds and return True, otherwise return False.
-        """
-        output = parse(self.parsers[char.CMD_LIST_BGS], user_input)
-        if output is None:
-            return False
+    async def do_list_bgs(self, output):
+        """ List available backgrounds. """
         for bg in self.data.backgrounds:
             prefix = self.data.strings[cat.COMMON][common.LIST_PREFIX]
             self.io.say(prefix, bg.name)
-        return True
 
-    def try_list_species(self, user_input):
-        """
-        If 'user_input' is a 'list species' command invokation, list available
-        species and return True, otherwise return False.
-        """
-        output = parse(self.parsers[char.CMD_LIST_SPECIES], user_input)
-        if output is None:
-            return False
+    async def do_list_species(self, output):
+        """ List available species. """
         for species in self.data.species:
             prefix = self.data.strings[cat.COMMON][common.LIST_PREFIX]
             self.io.say(prefix, species.name)
-        return True
 
-    def try_overview(self, user_input):
-        """
-        If 'user_input' is an 'overview' command invokation, print out an
-        overview of the character being created.
-        """
-        output = parse(self.parsers[char.CMD_OVERVIEW], user_input)
-        if output is None:
-            return False
+    async def do_overview(self, output):
+        """ Print out an overview of the character being created. """
         self.io.say(self.overview())
-        return True
 
-    def try_set_bg(self, user_input):
-        """
-        If 'user_input' is a 'set bg' command invokation, set the background of
-        the character being created to the value captured by the parser.
-        """
-        output = parse(self.parsers[char.CMD_SET_BG], user_input)
-        if output is None:
-            return False
+    async def do_set_bg(self, output):
+        """ Set the background of the character to the captured value. """
         bg = output[Capture.BACKGROUND]
         if bg is None:
             self.io.say(self.data.strings[cat.CHAR_CREATION][char.NOT_A_VALID_BG])
-            return True
+            self.say_suggestions(self.data.background_suggestions.suggest(
+                output[Capture.UNKNOWN_BACKGROUND]))
+            return
         self.background = bg
-        return True
 
-    def try_set_name(self, user_input):
-        """
-        If 'user_input' is a 'set name' command invokation, set the name of the
-        character being edited or created.
-        """
-        output = parse(self.parsers[char.CMD_SET_NAME], user_input)
-        if output is None:
-            return False
+    async def do_set_name(self, output):
+        """ Set the name of the character being edited or created. """
         name = misc.pretty_name(output[Capture.NAME])
         self.name = name
         msg = self.data.strings[cat.CHAR_CREATION][char.NEW_NAME_IS]
         msg = msg.format(name=name)
         self.io.say(msg)
-        return True
 
-    def try_set_species(self, user_input):
-        """
-        If 'user_input' is a 'set species' command invokation, set the species
-        of the character being created to the value captured by the parser.
-        """
-        output = parse(self.parsers[char.CMD_SET_SPECIES], user_input)
-        if output is None:
-            return False
+    async def do_set_species(self, output):
+        """ Set the species of the character to the captured value. """
         species = output[Capture.SPECIES]
         if species is None:
             self.io.say(self.data.strings[cat.CHAR_CREATION][char.NOT_A_VALID_SPECIES])
-            return True
+            self.say_suggestions(self.data.species_suggestions.suggest(
+                output[Capture.UNKNOWN_SPECIES]))
+            return
         self.species = species
-        return True
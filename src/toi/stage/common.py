@@ -2,7 +2,8 @@
 Common stage module.
 
 Provides several functions and classes to handle common interactions like using
-help system and asking simple questions.
+help system and asking simple questions. Flows, their actions and the
+question-asking functions are coroutines (see 'toi.stage.runner').
 """
 
 
@@ -12,14 +13,18 @@ import enum
 import mofloc
 
 
+import toi.cat as cat
 import toi.cat.common as common
+import toi.commands as commands
+import toi.gamestate as gamestate
 import toi.parser as parser
+import toi.stage.runner as runner
 
 
 #--------- public flow subclasses and other things ---------#
 
 
-class GameFlow(mofloc.Flow):
+class GameFlow(runner.Flow):
     """ A flow that is aware of game data and game state of some sort. """
 
     def __init__(self, io, data, game):
@@ -30,30 +35,72 @@ class GameFlow(mofloc.Flow):
 
 
 class FlowWithHelp(GameFlow):
-    """ A flow that can query game help system. """
+    """
+    A flow that can query game help system and dispatch user input to its
+    actions.
+    """
 
-    def try_help(self, user_input):
+    def __init__(self, io, data, game):
+        super().__init__(io, data, game)
+        self.actions = {}
+        self.dispatcher = None
+
+    async def dispatch(self, user_input):
         """
-        If 'user_input' is a help command invokation, run the help flow and
-        return True, otherwise do nothing and return False.
+        Run the action matching 'user_input' and return True, or do nothing
+        and return False if there is no such action.
         """
-        output = parser.parse(self.game.common_parsers[common.CMD_HELP], user_input)
-        if output is None:
+        command = self.dispatcher.parse(user_input, self.game)
+        if command is None:
             return False
+        key, output = command
+        await self.actions[key](output)
+        return True
+
+    def say_suggestions(self, suggestions):
+        """ Suggest what the player might have meant, if there's anything. """
+        if not suggestions:
+            return
+        strings = self.data.strings[cat.COMMON]
+        quoted = map(lambda suggestion: f"'{suggestion}'", suggestions)
+        self.io.say(strings[common.DID_YOU_MEAN].format(
+            suggestions=strings[common.LIST_OR].join(quoted)))
+
+    def say_what(self, user_input):
+        """
+        Tell the player their input is not understood, suggesting the commands
+        they might have meant.
+        """
+        self.io.say(self.data.strings[cat.COMMON][common.WHAT])
+        self.say_suggestions(self.dispatcher.suggest(user_input))
+
+    def make_dispatcher(self, commands):
+        """
+        Return a dispatcher for given commands - an iterable of (control
+        category, command key) pairs, in the order of priority. It's shared
+        with the other flows using the same game data.
+        """
+        return gamestate.shared_dispatcher(self.data, commands)
+
+    async def do_apropos(self, output):
+        """ List the help topics matching the words given. """
+        _apropos(output[parser.Capture.TOPIC], self.io, self.data)
+
+    async def do_help(self, output):
+        """ Run the help flow. """
         help_flow = _HelpFlow(self.io, self.data, self.game)
         if parser.Capture.TOPIC in output:
-            mofloc.execute(help_flow, HELP_PARTICULAR, output[parser.Capture.TOPIC])
+            await runner.execute(help_flow, HELP_PARTICULAR, output[parser.Capture.TOPIC], True)
         else:
-            mofloc.execute(help_flow, HELP_GENERAL)
-        return True
+            await runner.execute(help_flow, HELP_GENERAL)
 
 
-def yesno(prompt, reprompt, common_parsers, io):
+async def yesno(prompt, reprompt, common_parsers, io):
     """
     Ask a simple yes/no question. Insist on yes/no until a suitable response is
     received. Return appropriate Response value.
     """
-    inp = io.ask(prompt)
+    inp = await io.ask(prompt)
     yes_parser = common_parsers[common.CMD_YES]
     no_parser = common_parsers[common.CMD_NO]
     while True:
@@ -63,15 +110,15 @@ def yesno(prompt, reprompt, common_parsers, io):
         output = parser.parse(no_parser, inp)
         if output is not None:
             return Response.NO
-        inp = io.ask(reprompt)
+        inp = await io.ask(reprompt)
 
 
-def yesnoabort(prompt, reprompt, common_parsers, io):
+async def yesnoabort(prompt, reprompt, common_parsers, io):
     """
     Ask a simple yes/no/abort question. Insist on yes/no/abort until a suitable
     response is received. Return appropriate Response value.
     """
-    inp = io.ask(prompt)
+    inp = await io.ask(prompt)
     yes_parser = common_parsers[common.CMD_YES]
     no_parser = common_parsers[common.CMD_NO]
     abort_parser = common_parsers[common.CMD_ABORT]
@@ -85,33 +132,109 @@ def yesnoabort(prompt, reprompt, common_parsers, io):
         output = parser.parse(abort_parser, inp)
         if output is not None:
             return Response.ABORT
-        inp = io.ask(reprompt)
+        inp = await io.ask(reprompt)
 
 
 #--------- helper things ---------#
 
 
-class _HelpFlow(GameFlow):
+class _HelpFlow(FlowWithHelp):
     """ A flow that queries the game help system. """
 
     def __init__(self, io, data, game):
         super().__init__(io, data, game)
         self.register_entry_point(HELP_PARTICULAR, self.help_for_topic)
         self.register_entry_point(HELP_GENERAL, self.general_help)
+        self.actions[common.CMD_ABORT] = self.do_leave
+        self.actions[common.CMD_APROPOS] = self.do_apropos
+        self.actions[common.CMD_HELP] = self.do_topic
+        self.actions[common.CMD_QUIT] = self.do_leave
 
-    def help_for_topic(self, topic, exit_after=False):
+    def prepare_dispatcher(self):
+        """ Prepare user input dispatcher. """
+        return self.make_dispatcher(commands.HELP)
+
+    async def help_for_topic(self, topic, exit_after=False):
         """ Display the help for a given topic and then (optionally) exit. """
-        raise mofloc.EndFlow
+        self.show_topic(topic)
+        if exit_after:
+            raise mofloc.EndFlow
+        await self.help_loop()
 
-    def general_help(self):
+    async def general_help(self):
         """ Run interactive help session. """
+        self.show_topics()
+        await self.help_loop()
+
+    async def help_loop(self):
+        """ Show the topics the player asks for until they leave. """
+        strings = self.data.strings[cat.COMMON]
+        self.dispatcher = self.prepare_dispatcher()
+        while True:
+            inp = await self.io.ask(strings[common.HELP_PROMPT], True)
+            if await self.dispatch(inp):
+                continue
+            if not inp:
+                self.io.say(strings[common.EMPTY_CMD])
+                continue
+            self.show_topic(inp)
+
+    def show_topic(self, topic):
+        """
+        Display the help for a given topic. If there's no such topic, suggest
+        the ones matching it.
+        """
+        found = self.data.help.find(topic)
+        if found is not None:
+            self.io.say(found.text)
+            return
+        strings = self.data.strings[cat.COMMON]
+        self.io.say(strings[common.NO_HELP].format(topic=topic))
+        suggestions = self.data.help.apropos(topic, MAX_SUGGESTIONS)
+        if suggestions:
+            self.io.say(strings[common.HELP_MAYBE])
+            _list_topics(suggestions, self.io, self.data)
+
+    def show_topics(self):
+        """ Display the list of all help topics. """
+        self.io.say(self.data.strings[cat.COMMON][common.HELP_GREETING])
+        _list_topics(self.data.help.topics, self.io, self.data)
+
+    async def do_leave(self, output):
+        """ Leave the help system. """
         raise mofloc.EndFlow
 
+    async def do_topic(self, output):
+        """ Display the help for a topic, or the list of topics. """
+        if parser.Capture.TOPIC in output:
+            self.show_topic(output[parser.Capture.TOPIC])
+        else:
+            self.show_topics()
+
+
+def _apropos(topic, io, data):
+    """ Display the list of help topics matching the words of 'topic'. """
+    strings = data.strings[cat.COMMON]
+    found = data.help.apropos(topic)
+    if not found:
+        io.say(strings[common.APROPOS_NOTHING].format(topic=topic))
+        return
+    io.say(strings[common.APROPOS_FOUND].format(topic=topic))
+    _list_topics(found, io, data)
+
+
+def _list_topics(topics, io, data):
+    """ Display a list of help topics. """
+    prefix = data.strings[cat.COMMON][common.LIST_PREFIX]
+    for topic in topics:
+        io.say(prefix, topic.name)
+
 
 #--------- helper things ---------#
 
 HELP_PARTICULAR = "particular"
 HELP_GENERAL = "general"
+MAX_SUGGESTIONS = 5
 
 
 class Response(enum.Enum):
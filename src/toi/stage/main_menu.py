@@ -11,9 +11,10 @@ import mofloc
 import toi.cat as cat
 import toi.cat.common as common
 import toi.cat.main_menu as mm
+import toi.commands as commands
 import toi.gamestate as state
-from toi.parser import make_parser, parse
 import toi.stage.common as cstage
+import toi.stage.runner as runner
 
 
 FROM_GAME_PROPER = "from game"
@@ -29,87 +30,65 @@ class MainMenuFlow(cstage.FlowWithHelp):
         self.register_entry_point(FROM_GAME_PROPER, self.from_game_proper)
         self.register_entry_point(FROM_PARTY_CREATION, self.from_party_creation)
         self.register_entry_point(FROM_STARTUP, self.from_startup)
-        self.parsers = self.prepare_parsers()
+        self.actions[common.CMD_APROPOS] = self.do_apropos
+        self.actions[common.CMD_HELP] = self.do_help
+        self.actions[common.CMD_QUIT] = self.do_quit
+        self.actions[mm.CMD_GREET] = self.do_greet
+        self.actions[mm.CMD_NEW_GAME] = self.do_new_game
+        self.dispatcher = self.prepare_dispatcher()
 
     #--------- helper things ---------#
 
-    def prepare_parsers(self):
-        """ Prepare user input parsers. """
-        res = {}
-        control = self.data.control[cat.MAIN_MENU]
-        res[mm.CMD_NEW_GAME] = make_parser(control[mm.CMD_NEW_GAME], self)
-        res[mm.CMD_GREET] = make_parser(control[mm.CMD_GREET], self)
-        return res
+    def prepare_dispatcher(self):
+        """ Prepare user input dispatcher. """
+        return self.make_dispatcher(commands.MAIN_MENU)
 
     #--------- entry points ---------#
 
-    def from_game_proper(self):
+    async def from_game_proper(self):
         """
         Actions to perform if the menu was invoked from inside the game.
         """
         raise NotImplementedError
 
-    def from_party_creation(self):
+    async def from_party_creation(self):
         """
         Actions to perform if the menu was entered from the party creation
         menu.
         """
         self.io.say(self.data.strings[cat.MAIN_MENU][mm.WELCOME_BACK])
-        self.main_loop()
+        await self.main_loop()
 
-    def from_startup(self):
+    async def from_startup(self):
         """
         Actions to perform if this flow was entered from the startup flow.
         """
         self.io.say(self.data.strings[cat.MAIN_MENU][mm.GREETING])
-        self.main_loop()
+        await self.main_loop()
 
-    def main_loop(self):
+    async def main_loop(self):
         """ Main processing loop. """
         while True:
-            inp = self.io.ask(self.data.strings[cat.MAIN_MENU][mm.PROMPT])
-            if self.try_help(inp):
+            inp = await self.io.ask(self.data.strings[cat.MAIN_MENU][mm.PROMPT])
+            if await self.dispatch(inp):
                 continue
-            if self.try_greet(inp):
-                continue
-            self.try_new_game(inp)
-            self.try_quit(inp)
             # wut?
-            self.io.say(self.data.strings[cat.COMMON][common.WHAT])
+            self.say_what(inp)
 
     #--------- menu actions ---------#
 
-    def try_greet(self, user_input):
-        """
-        If 'user_input' is a 'greet me' command invokation, greet the player
-        one more time and return True, otherwise return False.
-        """
-        output = parse(self.parsers[mm.CMD_GREET], user_input)
-        if output is None:
-            return False
+    async def do_greet(self, output):
+        """ Greet the player one more time. """
         self.io.say(self.data.strings[cat.MAIN_MENU][mm.GREETING])
-        return True
 
-    def try_new_game(self, user_input):
-        """
-        If 'user_input' is a 'new game' command invokation, run the party
-        creation flow, otherwise return False.
-        """
-        output = parse(self.parsers[mm.CMD_NEW_GAME], user_input)
-        if output is None:
-            return False
+    async def do_new_game(self, output):
+        """ Run the party creation flow. """
         import toi.stage.party_creation as party
         target_flow = party.PartyCreationFlow(self.io, self.data)
-        raise mofloc.ChangeFlow(target_flow, party.FROM_MAIN_MENU)
+        raise runner.ChangeFlow(target_flow, party.FROM_MAIN_MENU)
 
-    def try_quit(self, user_input):
-        """
-        If 'user_input' is a 'quit' command invokation, quit the game,
-        otherwise return False.
-        """
-        output = parse(self.game.common_parsers[common.CMD_QUIT], user_input)
-        if output is None:
-            return False
+    async def do_quit(self, output):
+        """ Quit the game. """
         self.io.say(self.data.strings[cat.COMMON][common.FAREWELL])
         self.io.flush()
         raise mofloc.EndFlow
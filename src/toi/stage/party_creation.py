@@ -9,14 +9,19 @@ import mofloc
 
 
 import toi.cat as cat
+import toi.cat.char_creation as char
 import toi.cat.common as common
 import toi.cat.party_creation as party
+import toi.commands as commands
+from toi.fuzzy import FuzzyIndex
 import toi.gamestate as state
 import toi.misc as misc
-from toi.parser import make_parser, parse, Capture
+from toi.parser import Capture
 from toi.party import Party
+from toi.pc import PlayerCharacter
 import toi.stage.common as cstage
 import toi.stage.char_creation as charstage
+import toi.stage.runner as runner
 
 
 FROM_MAIN_MENU = "from main menu"
@@ -28,172 +33,126 @@ class PartyCreationFlow(cstage.FlowWithHelp):
     def __init__(self, io, data):
         super().__init__(io, data, StateWithParty(data))
         self.register_entry_point(FROM_MAIN_MENU, self.from_main_menu)
-        self.parsers = self.prepare_parsers()
+        self.actions[common.CMD_ABORT] = self.do_abort
+        self.actions[common.CMD_APROPOS] = self.do_apropos
+        self.actions[common.CMD_HELP] = self.do_help
+        self.actions[common.CMD_QUIT] = self.do_quit
+        self.actions[party.CMD_ADD] = self.do_add
+        self.actions[party.CMD_CHANGE_PARTY_NAME] = self.do_change_name
+        self.actions[party.CMD_DELETE] = self.do_delete
+        self.actions[party.CMD_EDIT] = self.do_edit
+        self.actions[party.CMD_OVERVIEW] = self.do_overview
+        self.actions[party.CMD_QUICK_ADD] = self.do_quick_add
+        self.dispatcher = self.prepare_dispatcher()
 
     #--------- helper things ---------#
 
-    def prepare_parsers(self):
-        """ Prepare parsers used in party creation actions. """
-        res = {}
-        control = self.data.control[cat.PARTY_CREATION]
-        res[party.CMD_ADD] = make_parser(control[party.CMD_ADD], self.game)
-        res[party.CMD_CHANGE_PARTY_NAME] = make_parser(
-            control[party.CMD_CHANGE_PARTY_NAME], self.game)
-        res[party.CMD_DELETE] = make_parser(control[party.CMD_DELETE], self.game)
-        res[party.CMD_DONE] = make_parser(control[party.CMD_DONE], self.game)
-        res[party.CMD_EDIT] = make_parser(control[party.CMD_EDIT], self.game)
-        res[party.CMD_OVERVIEW] = make_parser(control[party.CMD_OVERVIEW], self.game)
-        res[party.CMD_QUICK_ADD] = make_parser(control[party.CMD_QUICK_ADD], self.game)
-        return res
+    def prepare_dispatcher(self):
+        """ Prepare the dispatcher used in party creation actions. """
+        return self.make_dispatcher(commands.PARTY_CREATION)
 
     def welcome_back(self):
         """ Print 'welcome back' message to mark the end of a subflow. """
         self.io.say(self.data.strings[cat.PARTY_CREATION][party.WELCOME_BACK])
 
-    def read_party_name(self):
+    async def read_party_name(self):
         """ Read party's name. """
-        name = self.io.ask(self.data.strings[cat.PARTY_CREATION][party.NAME_PROMPT])
+        name = await self.io.ask(self.data.strings[cat.PARTY_CREATION][party.NAME_PROMPT])
         return misc.pretty_name(name)
 
     #--------- entry points ---------#
 
-    def from_main_menu(self):
+    async def from_main_menu(self):
         """
         Actions to perform if this flow is entered from the main menu.
         """
         self.io.say(self.data.strings[cat.PARTY_CREATION][party.GREETING])
-        name = self.read_party_name()
+        name = await self.read_party_name()
         p = Party(name)
         self.game.party = p
         while True:
-            inp = self.io.ask(self.data.strings[cat.PARTY_CREATION][party.NEXT])
-            # common actions
-            self.try_abort(inp)
-            if self.try_help(inp):
+            inp = await self.io.ask(self.data.strings[cat.PARTY_CREATION][party.NEXT])
+            if await self.dispatch(inp):
                 continue
-            self.try_quit(inp)
-            # flow-specific actions
-            if self.try_add(inp):
-                continue
-            if self.try_change_name(inp):
-                continue
-            if self.try_delete(inp):
-                continue
-            if self.try_edit(inp):
-                continue
-            if self.try_overview(inp):
-                continue
-            self.io.say(self.data.strings[cat.COMMON][common.WHAT])
+            self.say_what(inp)
 
     #--------- actions ---------#
 
-    def try_abort(self, user_input):
-        """
-        If 'user_input' is an 'abort' command invokation, return to the main
-        menu, otherwise return False.
-        """
-        output = parse(self.game.common_parsers[common.CMD_ABORT], user_input)
-        if output is None:
-            return False
+    async def do_abort(self, output):
+        """ Return to the main menu. """
         import toi.stage.main_menu as mm
         self.io.say(self.data.strings[cat.COMMON][common.OKAY])
         target = mm.MainMenuFlow(self.io, self.data)
-        raise mofloc.ChangeFlow(target, mm.FROM_PARTY_CREATION)
+        raise runner.ChangeFlow(target, mm.FROM_PARTY_CREATION)
 
-    def try_add(self, user_input):
-        """
-        If 'user_input' is an 'add' command invokation, start a
-        CharCreationFlow subflow and then return True, otherwise return False.
-        """
-        output = parse(self.parsers[party.CMD_ADD], user_input)
-        if output is None:
-            return False
+    async def do_add(self, output):
+        """ Start a CharCreationFlow subflow to add a character. """
         subflow = charstage.CharCreationFlow(self.io, self.data, self.game)
-        mofloc.execute(subflow, charstage.CREATE_NEW)
+        await runner.execute(subflow, charstage.CREATE_NEW)
         self.welcome_back()
-        return True
 
-    def try_change_name(self, user_input):
-        """
-        If 'user_input' is a 'change name' command invokation, change party's
-        name, print it out and return True, otherwise return False.
-        """
-        output = parse(self.parsers[party.CMD_CHANGE_PARTY_NAME], user_input)
-        if output is None:
-            return False
+    async def do_change_name(self, output):
+        """ Change party's name and print it out. """
         name = misc.pretty_name(output[Capture.NAME])
-        self.game.party.name = name
+        self.game.party.set_name(name)
         msg = self.data.strings[cat.PARTY_CREATION][party.NEW_NAME_IS]
         msg = msg.format(party_name=name)
         self.io.say(msg)
-        return True
 
-    def try_delete(self, user_input):
-        """
-        If 'user_input' is a 'delete' command invokation, delete the specified
-        character from the party and return True, otherwise return False.
-        """
-        output = parse(self.parsers[party.CMD_DELETE], user_input)
-        if output is None:
-            return False
+    async def do_delete(self, output):
+        """ Delete the specified character from the party. """
         if output[Capture.PC] is None:
             self.io.say(self.data.strings[cat.COMMON][common.NO_SUCH_CHAR])
-            return True
+            self.say_suggestions(self.game.suggest_pc(output[Capture.UNKNOWN_PC]))
+            return
         self.game.party.delete_character(output[Capture.PC])
         msg = self.data.strings[cat.PARTY_CREATION][party.DONE_DELETING]
         msg = msg.format(deleted_pc=output[Capture.PC].name)
         self.io.say(msg)
-        return True
 
-    def try_edit(self, user_input):
-        """
-        If 'user_input' is an 'edit' command invokation, edit a specified
-        character using CharCreationFlow and then return True, otherwise return
-        False.
-        """
-        output = parse(self.parsers[party.CMD_EDIT], user_input)
-        if output is None:
-            return False
+    async def do_edit(self, output):
+        """ Edit the specified character using CharCreationFlow. """
         if output[Capture.PC] is None:
             self.io.say(self.data.strings[cat.PARTY_CREATION][party.NO_SUCH_CHARACTER])
-            return True
+            self.say_suggestions(self.game.suggest_pc(output[Capture.UNKNOWN_PC]))
+            return
         subflow = charstage.CharCreationFlow(self.io, self.data, self.game)
-        mofloc.execute(subflow, charstage.EDIT_EXISTING, output[Capture.PC])
+        await runner.execute(subflow, charstage.EDIT_EXISTING, output[Capture.PC])
         self.welcome_back()
-        return True
 
-    def try_overview(self, user_input):
-        """
-        If 'user_input' is a 'list' command invokation, print party's name and
-        short info on each character, then return True, otherwise return False.
-        """
-        output = parse(self.parsers[party.CMD_OVERVIEW], user_input)
-        if output is None:
-            return False
+    async def do_overview(self, output):
+        """ Print party's name and short info on each character. """
         strings = self.data.strings[cat.PARTY_CREATION]
         self.io.say(strings[party.NAME_IS].format(party_name=self.game.party.name))
-        try:
-            _ = self.game.party.characters[0]
-            empty = False
-        except IndexError:
-            empty = True
-        if empty:
+        if len(self.game.party.characters) == 0:
             self.io.say(strings[party.EMPTY_PARTY])
         else:
             self.io.say(strings[party.LIST_OF_CHARS])
             for pc in self.game.party.characters:
                 prefix = self.data.strings[cat.COMMON][common.LIST_PREFIX]
                 self.io.say(prefix, pc.short_description(self.data.strings))
-        return True
 
-    def try_quit(self, user_input):
-        """
-        If 'user_input' is a 'quit' command invokation, quit the game,
-        otherwise return False.
-        """
-        output = parse(self.game.common_parsers[common.CMD_QUIT], user_input)
-        if output is None:
-            return False
+    async def do_quick_add(self, output):
+        """ Add a character with a given name, species and background. """
+        strings = self.data.strings[cat.CHAR_CREATION]
+        if output[Capture.SPECIES] is None:
+            self.io.say(strings[char.NOT_A_VALID_SPECIES])
+            self.say_suggestions(self.data.species_suggestions.suggest(
+                output[Capture.UNKNOWN_SPECIES]))
+            return
+        if output[Capture.BACKGROUND] is None:
+            self.io.say(strings[char.NOT_A_VALID_BG])
+            self.say_suggestions(self.data.background_suggestions.suggest(
+                output[Capture.UNKNOWN_BACKGROUND]))
+            return
+        name = misc.pretty_name(output[Capture.NAME])
+        pc = PlayerCharacter(name, output[Capture.SPECIES], output[Capture.BACKGROUND])
+        self.game.party.add_character(pc)
+        msg = self.data.strings[cat.PARTY_CREATION][party.CHAR_ADDED]
+        self.io.say(msg.format(name=name))
+
+    async def do_quit(self, output):
+        """ Quit the game. """
         if self.game.party is None:
             farewell = self.data.strings[cat.COMMON][common.FAREWELL]
         else:
@@ -215,3 +174,22 @@ class StateWithParty(state.GameState):
     def __init__(self, data):
         super().__init__(data)
         self.party = None
+        self.pc_suggestions = None
+        self.pc_suggestions_key = None
+
+    def suggest_pc(self, name):
+        """
+        Return a list of the names of the characters whose names or aliases
+        are close to a given one. The index of the names is rebuilt whenever
+        the party changes.
+        """
+        if self.party is None:
+            return []
+        key = (self.party, self.party.version)
+        if self.pc_suggestions_key != key:
+            self.pc_suggestions = FuzzyIndex(
+                (alias, pc.name)
+                for alias, pcs in self.party.index.items()
+                for pc in pcs.values())
+            self.pc_suggestions_key = key
+        return self.pc_suggestions.suggest(name)
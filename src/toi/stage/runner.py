@@ -0,0 +1,86 @@
+"""
+Runner module.
+
+Provides Flow base class whose entry points are coroutines, ChangeFlow exception
+to switch between such flows and 'execute' coroutine to run them. 'run'
+function runs a flow synchronously, in its own event loop - this is what the
+terminal mode uses. Any number of flows can be executed concurrently in a single
+event loop with 'execute'. An observer set with 'observe' is told about every
+entry point called and every flow ended in the current context, which is how
+sessions are recorded.
+"""
+
+
+import asyncio
+import contextvars
+
+
+import mofloc
+
+
+ENTER = "enter"
+END = "end"
+
+_OBSERVER = contextvars.ContextVar("observer", default=None)
+
+
+class Flow(mofloc.Flow):
+    """ A flow with coroutine entry points. """
+
+    def __init__(self):
+        super().__init__()
+        self.entries = {}
+
+    def register_entry_point(self, name, function):
+        """
+        Register a coroutine function as an entry point with a given name.
+        """
+        super().register_entry_point(name, function)
+        self.entries[name] = function
+
+
+class ChangeFlow(mofloc.ChangeFlow):
+    """ Raised to transfer control to another flow. """
+
+    def __init__(self, flow, entry_point, *args):
+        super().__init__(flow, entry_point, *args)
+        self.flow = flow
+        self.entry_point = entry_point
+        self.entry_args = args
+
+
+async def execute(flow, entry_point, *args):
+    """
+    Run a flow starting with a given entry point, following the flow changes
+    until a flow ends.
+    """
+    observer = _OBSERVER.get()
+    while True:
+        if observer is not None:
+            observer(ENTER, flow, entry_point)
+        try:
+            await flow.entries[entry_point](*args)
+            break
+        except mofloc.EndFlow:
+            break
+        except ChangeFlow as change:
+            flow = change.flow
+            entry_point = change.entry_point
+            args = change.entry_args
+    if observer is not None:
+        observer(END, flow, entry_point)
+
+
+def observe(observer):
+    """
+    Set an observer for the flows executed in the current context (that is, in
+    the current task and the tasks it creates from now on). The observer is
+    called with ENTER or END, the flow and the entry point name; None removes
+    the observer.
+    """
+    _OBSERVER.set(observer)
+
+
+def run(flow, entry_point, *args):
+    """ Run a flow synchronously. """
+    asyncio.run(execute(flow, entry_point, *args))
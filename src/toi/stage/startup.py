@@ -6,31 +6,36 @@ to the main menu flow.
 """
 
 
-import mofloc
-
-
 from toi.gamedata import GameData
 import toi.gameio as gameio
 import toi.stage.main_menu as mm
+import toi.stage.runner as runner
 
 
 ENTRY_POINT = "the-only"
 
 
-class StartupFlow(mofloc.Flow):
+class StartupFlow(runner.Flow):
     """ Startup program flow. """
 
-    def __init__(self):
+    def __init__(self, io=None, data=None):
+        """
+        Create the flow. Optional 'io' and 'data' are the IO handler and the
+        game data to use instead of creating new ones.
+        """
         super().__init__()
-        self.register_entry_point(ENTRY_POINT, _start)
+        self.register_entry_point(ENTRY_POINT, lambda: _start(io, data))
 
 
-def _start():
+async def _start(io=None, data=None):
     """ Perform the setup. """
-    data = GameData()
-    io = _init_io()
+    if data is None:
+        data = GameData()
+    data.check_commands()
+    if io is None:
+        io = _init_io()
     next_flow = mm.MainMenuFlow(io, data)
-    raise mofloc.ChangeFlow(next_flow, mm.FROM_STARTUP)
+    raise runner.ChangeFlow(next_flow, mm.FROM_STARTUP)
 
 
 def _init_io():
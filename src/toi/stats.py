@@ -1,10 +1,12 @@
 """
 Statistics module.
 
-Provides player character statistic types.
+Provides player character statistic types and StatBlock class used to hold
+values of the statistics.
 """
 
 
+from array import array
 import enum
 
 
@@ -16,3 +18,59 @@ class Stat(enum.Enum):
     SPI = "spi"
     CHA = "cha"
     LUC = "luc"
+
+
+class StatBlock():
+    """
+    A fixed-layout vector of statistics, indexed by Stat members. Supports
+    dict-like item access and iteration over (Stat, value) pairs with 'items'.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, values=None):
+        """
+        Create a block. 'values' is a dict mapping Stat members to values, the
+        missing statistics are zero.
+        """
+        self.values = array("i", bytes(_SIZE * len(Stat)))
+        if values is not None:
+            for stat, value in values.items():
+                self[stat] = value
+
+    def __getitem__(self, stat):
+        return self.values[_ORDINALS[stat]]
+
+    def __setitem__(self, stat, value):
+        self.values[_ORDINALS[stat]] = value
+
+    def __iter__(self):
+        return iter(Stat)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __eq__(self, other):
+        if not isinstance(other, StatBlock):
+            return NotImplemented
+        return self.values == other.values
+
+    def __repr__(self):
+        return f"StatBlock({dict(self.items())})"
+
+    def copy(self):
+        """ Return a copy of the block. """
+        res = StatBlock.__new__(StatBlock)
+        res.values = array("i", self.values)
+        return res
+
+    def items(self):
+        """ Return a list of (Stat, value) pairs. """
+        return list(zip(Stat, self.values))
+
+
+#--------- helper things ---------#
+
+
+_ORDINALS = {stat: i for i, stat in enumerate(Stat)}
+_SIZE = array("i").itemsize
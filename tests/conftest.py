@@ -0,0 +1,14 @@
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(ROOT / "src"))
+
+
+import toi.read
+
+
+# read the game files of this tree wherever the tests are run from
+toi.read.set_overlays([str(ROOT)])
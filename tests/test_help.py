@@ -0,0 +1,92 @@
+from pathlib import Path
+import re
+
+
+import pytest
+import yaml
+
+
+import toi.commands as commands
+from toi.gamedata import GameData
+import toi.grammar as grammar
+from toi.help import Help, Topic
+
+
+HELP_DIR = Path(__file__).resolve().parent.parent / "help"
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    topics = []
+    for path in sorted(HELP_DIR.glob("*.yaml")):
+        with open(path) as f:
+            topics.extend(map(Topic, yaml.safe_load(f)))
+    return Help(topics)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("species", "species"),
+    ("party name", "party name"),
+    ("Party  Name", "party name"),
+    ("qadd", "quick add"),
+    ])
+def test_apropos_exact_name_first(corpus, query, expected):
+    assert corpus.apropos(query)[0].name == expected
+
+
+def test_apropos_ranks_by_matched_words(corpus):
+    names = [topic.name for topic in corpus.apropos("party")]
+    assert names[0] == "party creation"
+    assert "party name" in names
+
+
+def test_apropos_nothing(corpus):
+    assert corpus.apropos("xyzzy") == []
+
+
+# the flows whose commands the topics describe, the others may quote any command
+TOPIC_FLOWS = {
+    "backgrounds": commands.CHAR_CREATION,
+    "character creation": commands.CHAR_CREATION,
+    "main menu": commands.MAIN_MENU,
+    "party creation": commands.PARTY_CREATION,
+    "party name": commands.PARTY_CREATION,
+    "quick add": commands.PARTY_CREATION,
+    "species": commands.CHAR_CREATION,
+    }
+
+QUOTED = re.compile(r"(?<!\w)'([^']+)'(?!\w)")
+
+
+def to_regex(tokens):
+    parts = []
+    for token in tokens:
+        if token[0] == grammar.LITERAL:
+            parts.append(re.escape(token[1]))
+        elif token[0] == grammar.WHITESPACE:
+            parts.append(r"\s+")
+        elif token[0] == grammar.OPTIONAL:
+            parts.append(f"(?:{to_regex(token[1])})?")
+        else:
+            parts.append(".+")
+    return "".join(parts)
+
+
+@pytest.fixture(scope="module")
+def control():
+    return GameData().control
+
+
+def command_patterns(control, flow_commands):
+    return [re.compile(to_regex(grammar.compile(string)))
+            for _, strings in commands.merge(control, flow_commands)
+            for string in strings]
+
+
+def test_help_quotes_only_real_commands(corpus, control):
+    every_command = [(category, key) for category in control for key in control[category]]
+    for topic in corpus.topics:
+        patterns = command_patterns(control, TOPIC_FLOWS.get(topic.name, every_command))
+        for quoted in QUOTED.findall(topic.text):
+            assert any(pattern.fullmatch(quoted.lower()) for pattern in patterns), \
+                f"'{quoted}' in '{topic.name}' is not a command there"
@@ -0,0 +1,75 @@
+import os
+
+
+import pytest
+
+
+from toi.gamedata import GameData
+import toi.journal as journal
+from toi.pc import PlayerCharacter
+import toi.save as save
+
+
+NAMES = ["Alice", "Bob", "Carol", "Dave", "Eve", "Frank", "Grace", "Heidi", "Ivan", "Judy"]
+
+
+@pytest.fixture(scope="module")
+def data():
+    return GameData()
+
+
+@pytest.fixture
+def failing_snapshots(monkeypatch):
+    """ Make writing snapshots fail while the returned flag is set. """
+    state = {"failing": False}
+    write_file = save.write_file
+    def maybe_fail(path, contents):
+        if state["failing"]:
+            raise OSError("disk full")
+        write_file(path, contents)
+    monkeypatch.setattr(save, "write_file", maybe_fail)
+    return state
+
+
+def add(party, data, names):
+    for name in names:
+        party.add_character(PlayerCharacter(name, data.species[0], data.backgrounds[0]))
+
+
+def names(party):
+    return [pc.name for pc in party.characters]
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_failed_compactions_lose_nothing(tmp_path, data, failing_snapshots):
+    base = str(tmp_path / "party")
+    party = journal.open_party(base, data, "Party", threshold=3)
+    failing_snapshots["failing"] = True
+    add(party, data, NAMES[:3])
+    party.journal.close()
+    assert os.path.exists(f"{base}.journal.old")
+
+    failing_snapshots["failing"] = False
+    party = journal.open_party(base, data, "Party", threshold=3)
+    assert names(party) == NAMES[:3]
+    assert not os.path.exists(f"{base}.journal.old")
+
+    # the first compaction fails, the later ones must not overwrite its journal
+    failing_snapshots["failing"] = True
+    add(party, data, NAMES[3:])
+    party.journal.close()
+
+    failing_snapshots["failing"] = False
+    party = journal.open_party(base, data, "Party", threshold=3)
+    assert names(party) == NAMES
+    party.journal.close()
+
+
+def test_reopened_journal_counts_its_entries(tmp_path, data):
+    base = str(tmp_path / "party")
+    party = journal.open_party(base, data, "Party", threshold=100)
+    add(party, data, NAMES[:4])
+    party.journal.close()
+    party = journal.open_party(base, data, "Party", threshold=100)
+    assert party.journal.entries == 4
+    party.journal.close()